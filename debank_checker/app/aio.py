@@ -0,0 +1,197 @@
+import random
+import asyncio
+
+from urllib.parse import urlencode
+
+from .config import *
+from .signer import get_signer
+from .ratelimit import request_budget, get_limiter
+from .cache import get_cache, ResponseCache
+from .coalesce import request_memo
+from .metrics import metrics
+from .proxy import get_proxy_pool
+from .utils import DEBANK_HEADERS, signed_headers
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+
+class AsyncSession:
+    """异步模式下一个工作协程的会话：只记录代理池分配的代理，连接由 AsyncDebankClient 按出口共享"""
+
+    def __init__(self):
+        self.proxies = None
+
+
+class AsyncDebankClient:
+    """基于 httpx.AsyncClient 的 DeBank 客户端：数百个协程共用少量长连接（HTTP/2 时在同一连接上并发），
+    请求节奏由与线程模式相同的请求预算、接口限速器和代理预算控制"""
+
+    def __init__(self, max_connections, http2):
+        if httpx is None:
+            raise RuntimeError('未安装 httpx 库，无法使用异步客户端。可通过 pip install httpx 安装。')
+        if http2 and h2 is None:
+            logger.warning('未安装 h2 库，异步客户端改用 HTTP/1.1，每个连接同时只能进行一个请求。可通过 pip install httpx[http2] 安装。')
+            http2 = False
+        self.max_connections = max_connections
+        self.http2 = http2
+        self._clients = {}
+        self._gates = {}
+        self._inflight = {}
+
+    def _client(self, session):
+        # 每个出口（直连或每个代理）一个连接池
+        proxy = session.proxies['https'] if session.proxies else None
+        client = self._clients.get(proxy)
+        if client is None:
+            client = self._clients[proxy] = httpx.AsyncClient(
+                headers=DEBANK_HEADERS,
+                proxy=proxy,
+                http2=self.http2,
+                timeout=30,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            )
+        return client
+
+    async def _acquire(self, limiter):
+        # 同一个限速器上的协程按先后顺序排队，只有队首的协程轮询令牌，避免数百个协程同时被唤醒
+        gate = self._gates.get(limiter)
+        if gate is None:
+            gate = self._gates[limiter] = asyncio.Lock()
+        async with gate:
+            await limiter.acquire_async()
+
+    async def _sign(self, params, path):
+        with metrics.timer('sign_seconds', path):
+            future = get_signer().sign_async(params, 'GET', path)
+            return await asyncio.wait_for(asyncio.wrap_future(future), SIGNER_TIMEOUT)
+
+    async def send_request(self, session, path, params, max_retries=3):
+        retry_count = 0
+        base_delay = SLEEP_TIME
+        url = f'{DEBANK_API_URL}{path}?{urlencode(params)}'
+        proxy_pool = get_proxy_pool()
+
+        while retry_count < max_retries:
+            proxy = proxy_pool.proxy_for(session) if proxy_pool is not None else None
+            budget = proxy.budget if proxy is not None else request_budget
+            limiter = get_limiter(path, proxy.name if proxy is not None else None, budget.rate)
+            with metrics.timer('ratelimit_wait_seconds', path):
+                await self._acquire(limiter)
+                await self._acquire(budget)
+
+            try:
+                # 排队可能很久，拿到令牌后再签名，保证签名的时间戳是新的
+                headers = signed_headers(await self._sign(params, path))
+                metrics.inc('requests', path)
+                with metrics.timer('http_seconds', path):
+                    resp = await self._client(session).get(url, headers=headers)
+
+                if resp.status_code == 200:
+                    limiter.on_success()
+                    if proxy is not None:
+                        proxy_pool.on_success(proxy)
+                    if 'data' in resp.text and resp.json():
+                        return resp
+                    logger.error(f'Request not include data | Response: {resp.text}')
+                    retry_count += 1
+                elif resp.status_code == 429:
+                    limiter.on_throttled()
+                    metrics.inc('throttled', path)
+                    if proxy is not None:
+                        proxy_pool.on_throttled(proxy)
+                    logger.error(f"Too many requests. {path} 的速率已降至 {limiter.rate:.2f} 次/秒")
+                    retry_count += 1
+                else:
+                    logger.error(f'Bad request status code: {resp.status_code} | Method: GET | Response: {resp.text}')
+                    retry_count += 1
+                    if proxy is not None:
+                        proxy_pool.on_error(proxy)
+                    await asyncio.sleep(base_delay * (2 ** (retry_count - 1)) + random.uniform(0, 0.5))
+
+            except Exception as error:
+                retry_count += 1
+                if proxy is not None and '429' in str(error):
+                    # 代理自身限流（CONNECT 返回 429），与接口返回 429 同样处理
+                    limiter.on_throttled()
+                    metrics.inc('throttled', path)
+                    proxy_pool.on_throttled(proxy)
+                    logger.error(f"Too many requests. 代理 {proxy.name} 上 {path} 的速率已降至 {limiter.rate:.2f} 次/秒")
+                else:
+                    logger.error(f'Unexpected error while sending request to {url}: {error!r}')
+                    if proxy is not None:
+                        proxy_pool.on_error(proxy)
+                        proxy_pool.rotate(session)
+                    if isinstance(error, (asyncio.TimeoutError, httpx.TimeoutException)):
+                        wait_time = base_delay * (2 ** retry_count) * 3
+                        logger.error(f"Request timeout. Waiting for {wait_time:.1f} seconds before retrying.")
+                        await asyncio.sleep(wait_time)
+                    else:
+                        await asyncio.sleep(base_delay * (2 ** (retry_count - 1)) + random.uniform(0, 0.5))
+
+            if retry_count < max_retries:
+                metrics.inc('retries', path)
+
+        metrics.inc('failures', path)
+        logger.error(f"达到最大重试次数 ({max_retries})，跳过请求: {url}")
+        return None
+
+    async def fetch_json(self, session, path, params):
+        # 缓存是同步的 SQLite 读写（每次写入都提交），放到线程池中执行，不阻塞事件循环中的其他请求
+        cache = get_cache()
+        if cache is not None:
+            data = await asyncio.to_thread(cache.get, path, params)
+            if data is not None:
+                metrics.inc('cache_hits', path)
+                return data
+
+        resp = await self.send_request(session, path, params)
+        if resp is None:
+            raise RuntimeError(f'请求 {path} 失败')
+
+        data = resp.json()
+        if cache is not None:
+            await asyncio.to_thread(cache.set, path, params, data)
+        return data
+
+    async def request_json(self, session, path, params):
+        """与 utils.request_json 相同：相同的请求正在进行或刚刚完成时共享响应（不要修改），命中缓存时不发送请求"""
+        key = ResponseCache.make_key(path, params)
+        data = request_memo.get(key)
+        if data is not None:
+            metrics.inc('coalesced', path)
+            return data
+        future = self._inflight.get(key)
+        if future is not None:
+            metrics.inc('coalesced', path)
+            return await asyncio.shield(future)
+
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            data = await self.fetch_json(session, path, params)
+        except Exception as error:
+            future.set_exception(error)
+            # 没有其他协程等待时也标记为已读取，避免事件循环报告未处理的异常
+            future.exception()
+            raise
+        else:
+            future.set_result(data)
+            request_memo.put(key, data)
+        finally:
+            del self._inflight[key]
+            if not future.done():
+                # 请求被取消时，等待同一请求的协程也随之取消，不会一直等待
+                future.cancel()
+        return data
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
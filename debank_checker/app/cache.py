@@ -0,0 +1,134 @@
+import json
+import sqlite3
+import threading
+
+from time import time
+from urllib.parse import urlencode, parse_qsl
+
+from .config import *
+
+
+class ResponseCache:
+    """基于 SQLite 的 DeBank 响应缓存：按 (接口, 地址, 链) 缓存，带过期时间和容量上限"""
+
+    # 每写入多少条记录清理一次过期和超量的缓存
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, path=file_cache, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, path TEXT NOT NULL, created_at REAL NOT NULL, data TEXT NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses (created_at)')
+        self._conn.commit()
+        self.prune()
+
+    @staticmethod
+    def make_key(path, params):
+        return f'{path}?{urlencode(sorted(params.items()))}'
+
+    def get(self, path, params):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT created_at, data FROM responses WHERE key = ?',
+                (self.make_key(path, params),)
+            ).fetchone()
+        if row is None or time() - row[0] > self.ttl:
+            return None
+        return json.loads(row[1])
+
+    def has(self, path, params):
+        """只检查是否有未过期的缓存，不读取和解析响应内容"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT created_at FROM responses WHERE key = ?',
+                (self.make_key(path, params),)
+            ).fetchone()
+        return row is not None and time() - row[0] <= self.ttl
+
+    def set(self, path, params, data):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, path, created_at, data) VALUES (?, ?, ?, ?)',
+                (self.make_key(path, params), path, time(), json.dumps(data, ensure_ascii=False))
+            )
+            self._conn.commit()
+            self._writes += 1
+            need_prune = self._writes % self.PRUNE_INTERVAL == 0
+        if need_prune:
+            self.prune()
+
+    def symbol_chains(self, symbol):
+        """从缓存的全链代币列表（/token/cache_balance_list）中查找持有某个代币的链，返回 {钱包: 链集合}；
+        只包含缓存了全链代币列表的钱包，其他钱包的持仓无法从缓存中判断"""
+        cutoff = time() - self.ttl
+        wallet_chains = {}
+        # 先用 LIKE 粗筛出包含该代币的记录，避免解析全部缓存
+        pattern = f'%"optimized_symbol": {json.dumps(symbol, ensure_ascii=False)}%'
+        with self._lock:
+            full_keys = self._conn.execute(
+                'SELECT key FROM responses WHERE path = ? AND created_at >= ?',
+                ('/token/cache_balance_list', cutoff)
+            ).fetchall()
+            rows = self._conn.execute(
+                'SELECT key, data FROM responses WHERE path = ? AND created_at >= ? AND data LIKE ?',
+                ('/token/cache_balance_list', cutoff, pattern)
+            ).fetchall()
+
+        for (key,) in full_keys:
+            wallet = dict(parse_qsl(key.partition('?')[2])).get('user_addr')
+            wallet_chains[wallet] = set()
+        for key, data in rows:
+            wallet = dict(parse_qsl(key.partition('?')[2])).get('user_addr')
+            for coin in json.loads(data).get('data') or []:
+                if coin.get('optimized_symbol') == symbol:
+                    wallet_chains[wallet].add(coin.get('chain'))
+        return wallet_chains
+
+    def prune(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses WHERE created_at < ?', (time() - self.ttl,))
+            # 超出容量时淘汰最早写入的记录
+            self._conn.execute(
+                'DELETE FROM responses WHERE key IN ('
+                'SELECT key FROM responses ORDER BY created_at ASC '
+                'LIMIT max(0, (SELECT COUNT(*) FROM responses) - ?))',
+                (self.max_entries,)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """返回进程内共享的响应缓存，未启用缓存时返回 None"""
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def close_cache():
+    """关闭共享的响应缓存（如果已经打开）"""
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
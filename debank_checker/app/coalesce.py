@@ -0,0 +1,100 @@
+import threading
+
+from collections import OrderedDict
+from time import monotonic
+
+from .config import *
+
+
+class _Call:
+    """一次正在进行的请求，其他线程等待它完成后共享结果"""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestMemo:
+    """合并相同的 (接口, 参数) 请求：同时发起的相同请求只发送一次，其余线程等待并共享响应；
+    成功的响应在内存中保留 ttl 秒，期间再次请求直接返回。返回的响应被多个调用方共享，调用方不应修改它"""
+
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._recent = OrderedDict()
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        entry = self._recent.get(key)
+        if entry is None:
+            return None
+        created_at, data = entry
+        if monotonic() - created_at > self.ttl:
+            del self._recent[key]
+            return None
+        self._recent.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        """返回仍在有效期内的响应，没有时返回 None，不等待正在进行的请求"""
+        with self._lock:
+            entry = self._lookup(key)
+            return entry[1] if entry is not None else None
+
+    def put(self, key, data):
+        with self._lock:
+            self._remember(key, data)
+
+    def _remember(self, key, data):
+        if self.ttl <= 0:
+            return
+        self._recent[key] = (monotonic(), data)
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_entries:
+            self._recent.popitem(last=False)
+
+    def has(self, key):
+        with self._lock:
+            return key in self._calls or self._lookup(key) is not None
+
+    def get_or_fetch(self, key, fetch):
+        """返回 (响应, 是否与其他请求合并)；fetch 抛出的异常会传给所有等待同一请求的线程，失败的请求不会被保留"""
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry[1], True
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fetch()
+        except Exception as error:
+            call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._remember(key, call.result)
+            call.done.set()
+        return call.result, False
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+
+
+# 进程内共享的请求合并层，main.py 和 used_chains_checker.py 的各个阶段共用
+request_memo = RequestMemo(REQUEST_MEMO_TTL, REQUEST_MEMO_MAX_ENTRIES)
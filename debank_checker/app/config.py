@@ -1,15 +1,61 @@
+import os
+
 from loguru import logger
 from sys import stderr
 
+DEBANK_API_URL = os.environ.get('DEBANK_API_URL', 'https://api.debank.com')  # 可通过环境变量指向本地模拟服务器（见 bench/mock_debank.py）
 BLACK_COLOR = False     # 如果表格显示不正确，则更改为 True
-SLEEP_TIME = 1.5       # 如果出现“TOO MANY REQUESTS”错误，请在此处增加请求之间的休眠时间
-NODE_SLEEP_TIME = 0.2   # 如果你的电脑很卡，请增加这个值。
+SLEEP_TIME = 1.5       # 请求失败（非 429）后重试前的基础等待时间，按重试次数指数增加
+MAX_REQUESTS_PER_SECOND = 2  # 所有线程合计每秒最多发送的请求数，被 Cloudflare 限制时请调低
+# 每个 DeBank 接口独立的自适应速率（次/秒）：响应正常时逐步加速，出现“TOO MANY REQUESTS”时减速。
+# 每个请求同时受请求预算（MAX_REQUESTS_PER_SECOND，启用代理后为 PROXY_MAX_REQUESTS_PER_SECOND）限制，
+# 自适应速率只能在预算以下调整，RATE_MAX 高于预算时按预算计算；想提高速度时请同时调高预算
+RATE_INITIAL = 1.0      # 初始速率
+RATE_MIN = 0.2          # 最低速率
+RATE_MAX = 2.0          # 最高速率（不超过请求预算）
+RATE_INCREASE = 0.1     # 响应正常时每秒增加的速率
+RATE_DECREASE = 0.5     # 出现 429 时速率乘以该系数
+# 代理池：在 proxies.txt 中每行写一个代理即可启用，每个代理有独立的请求预算和自适应速率，吞吐量随代理数量线性增加
+PROXY_MAX_REQUESTS_PER_SECOND = 2  # 每个代理每秒最多发送的请求数（启用代理后取代 MAX_REQUESTS_PER_SECOND）
+PROXY_MAX_ERRORS = 3    # 代理连续出现多少次 429 或请求错误后被隔离
+PROXY_MAX_FAILURE_RATIO = 0.5  # 代理最近 20 次请求中 429 或请求错误的比例超过该值时被隔离
+PROXY_QUARANTINE_TIME = 120  # 代理被隔离的时间（秒），期间它的会话改用其他代理
+SIGNER_BACKEND = 'node' # 签名方式：'node' 使用 node 子进程；'wasm' 使用 wasmtime 在进程内签名（需要 pip install wasmtime）
+SIGNER_TIMEOUT = 10     # 等待签名服务返回结果的最长时间（秒），如果你的电脑很卡，请增加这个值。
+SIGN_PREFETCH = True    # 是否按任务队列顺序提前生成请求签名
+SIGN_PREFETCH_DEPTH = 50  # 最多提前生成多少个签名
+SIGN_MAX_AGE = 30       # 预取的签名超过多少秒未使用就丢弃，避免签名时间戳过期
+CACHE_ENABLED = True    # 是否缓存 DeBank 响应，重复查询时直接使用缓存，不再发送请求
+CACHE_TTL = 600         # 缓存有效期（秒）
+CACHE_MAX_ENTRIES = 100000  # 缓存最多保存的响应数量，超出时淘汰最早的记录
+REQUEST_MEMO_TTL = 60   # 相同的请求在多少秒内直接复用内存中的响应（同时发起的相同请求总是只发送一次），0 表示只合并同时发起的请求
+REQUEST_MEMO_MAX_ENTRIES = 256  # 内存中最多保留的响应数量
+USED_CHAINS_THREADS = 4 # used_chains_checker 扫描各链余额时的工作线程数（共享 MAX_REQUESTS_PER_SECOND 请求预算）
+CLIENT_BACKEND = 'thread'  # 请求方式：'thread' 每个工作线程一个 tls_client 会话；'async' 在一个事件循环中用协程并发发送（需要 httpx）
+ASYNC_CONCURRENCY = 200 # 异步模式下同时进行的任务数量，实际请求速度仍由请求预算和限速器控制
+ASYNC_MAX_CONNECTIONS = 32  # 异步模式下每个出口（直连或每个代理）最多保持的连接数，连接在请求之间复用
+ASYNC_HTTP2 = True      # 异步模式下使用 HTTP/2，在同一连接上同时进行多个请求（需要 pip install httpx[http2]，未安装时使用 HTTP/1.1）
+PRUNE_EMPTY_WALLETS = True  # 先获取总余额，总余额不超过最小金额的钱包不再逐链查询余额和池子
+# 增量刷新：总余额变化不超过 max(REFRESH_TOLERANCE_USD, 上次总余额 * REFRESH_TOLERANCE_RATIO) 的钱包沿用上次的逐链结果
+REFRESH_TOLERANCE_USD = 1.0
+REFRESH_TOLERANCE_RATIO = 0.01
+ALL_CHAIN_BALANCE = False  # 为 True 时每个钱包只请求一次 /token/cache_balance_list 获取所有链的代币，而不是每条链各请求一次
+TICKER_PUSHDOWN = True  # 查询特定代币时，先根据每个钱包的全链代币列表（优先使用缓存，没有时每个钱包请求一次）只查询持有该代币的链
+OUTPUT_FORMAT = 'json'  # 输出格式：'json' 查询结束后写入 balances.json；'ndjson' 每个钱包查询完成后立即写入 balances.ndjson 的一行
+JSON_COMPACT = False    # 为 True 时 balances.json 不缩进，文件更小、写入更快
+SNAPSHOT_ENABLED = False  # 为 True 时每次查询结果还会写入 balances.db（SQLite，保留历史批次），可用 snapshot_query.py 查询
+SUMMARY_TOP_N = 20      # 统计结果中只列出余额最高的多少个钱包，其余钱包只计入汇总
+SUMMARY_PAGE_SIZE = 50  # 在终端中运行时其余钱包每页显示多少个，0 表示不分页显示
 
-import os
-# 确保可以从任何路径运行时都能正确引用 js/main.js、balances.json、logs/log.log
+# 确保可以从任何路径运行时都能正确引用 js/main.js、balances.json、logs/log.log 等文件
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 file_js = os.path.join(BASE_DIR, 'js', 'main.js')
 file_json = os.path.join(BASE_DIR, 'balances.json')
+file_ndjson = os.path.join(BASE_DIR, 'balances.ndjson')
+file_cache = os.path.join(BASE_DIR, 'cache.db')
+file_journal = os.path.join(BASE_DIR, 'balances.journal')
+file_snapshot = os.path.join(BASE_DIR, 'balances.db')
+file_proxies = os.path.join(BASE_DIR, 'proxies.txt')
 file_log = os.path.join(BASE_DIR, 'logs', 'log.log')
 logger.remove()
 logger.add(stderr, format="<white>{time:HH:mm:ss}</white> | <level>{level: <8}</level> | <cyan>{line}</cyan> - <white>{message}</white>")
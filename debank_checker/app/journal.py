@@ -0,0 +1,80 @@
+import os
+import json
+import hashlib
+import threading
+
+from .config import *
+
+
+class CheckpointJournal:
+    """追加写入的断点日志：记录已完成的 (钱包, 链) 结果和钱包总余额，中断后可以跳过已完成的任务"""
+
+    def __init__(self, path=file_journal):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_run_key(wallets, ticker, min_amount):
+        # 钱包列表、代币和最小金额相同的查询才能互相续接
+        source = json.dumps([sorted(wallets), ticker, min_amount])
+        return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+    def load(self, run_key):
+        """读取与本次查询匹配的断点，返回 ({(链, 钱包): 代币列表}, {钱包: 总余额})"""
+        chain_results = {}
+        totals = {}
+        if not os.path.exists(self.path):
+            return chain_results, totals
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for i, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 中断时最后一行可能没有写完整，直接忽略
+                    continue
+                if i == 0:
+                    if record.get('type') != 'run' or record.get('key') != run_key:
+                        return {}, {}
+                    continue
+                if record['type'] == 'chain_balance':
+                    chain_results[(record['chain'], record['wallet'])] = record['coins']
+                elif record['type'] == 'wallet_total':
+                    totals[record['wallet']] = record['value']
+
+        return chain_results, totals
+
+    def start(self, run_key, resume=False):
+        """打开断点日志；resume 为 False 时丢弃旧的记录重新开始"""
+        with self._lock:
+            if resume and os.path.exists(self.path):
+                self._file = open(self.path, 'a', encoding='utf-8')
+            else:
+                self._file = open(self.path, 'w', encoding='utf-8')
+                self._write({'type': 'run', 'key': run_key})
+
+    def _write(self, record):
+        # 代币以 Holding 对象保存在内存中，写入时展开为字典
+        self._file.write(json.dumps(record, ensure_ascii=False, default=lambda coin: coin.to_dict()) + '\n')
+        self._file.flush()
+
+    def add_chain_balance(self, wallet, chain, coins):
+        with self._lock:
+            self._write({'type': 'chain_balance', 'wallet': wallet, 'chain': chain, 'coins': coins})
+
+    def add_wallet_total(self, wallet, value):
+        with self._lock:
+            self._write({'type': 'wallet_total', 'wallet': wallet, 'value': value})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def clear(self):
+        """查询结果已经完整保存后删除断点日志"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,36 +1,70 @@
-
 import json
 
-from .config import file_json
+from .config import file_json, JSON_COMPACT
 
-def save_full_to_json(wallets, chains, coins, balances, file_json):
+def build_full_entry(wallet, chains, coins, balances, updated_at=None):
     # 简洁模式：只输出wallet和total_all_chains
     if not chains:
-        data = []
-        for wallet in wallets:
-            data.append({
-                'wallet': wallet,
-                'total_all_chains': balances.get(wallet, 0)
+        return {
+            'wallet': wallet,
+            'total_all_chains': balances.get(wallet, 0)
+        }
+
+    # 详细模式
+    wallet_data = {
+        'wallet': wallet,
+        'chains': {},
+        'total_in_usd': 0,
+        'total_all_chains': balances.get(wallet, 0)
+    }
+    total_in_wallet = 0
+    for chain in chains:
+        chain_coins = coins.get(chain, {}).get(wallet, [])
+        chain_list = []
+        total_in_chain_for_wallet = 0.0
+        for coin in chain_coins:
+            coin_in_usd = 0 if coin["price"] is None else round(coin["amount"] * coin["price"], 2)
+            chain_list.append({
+                'ticker': coin['ticker'],
+                'amount': coin['amount'],
+                'price': coin['price'],
+                'name': coin['name'],
+                'usd': coin_in_usd,
+                'contract_address': coin.get('contract_address', '')
             })
-        with open(file_json, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return
-        
-    # 详细模式    
-    data = []
-    for wallet in wallets:
-        wallet_data = {
+            if isinstance(coin_in_usd, (int, float)):
+                total_in_wallet += coin_in_usd
+                total_in_chain_for_wallet += coin_in_usd
+        wallet_data['chains'][chain] = {
+            'coins': chain_list,
+            'total_usd_in_chain': round(total_in_chain_for_wallet, 2)
+        }
+    wallet_data['total_in_usd'] = round(total_in_wallet, 2)
+    if updated_at is not None:
+        wallet_data['updated_at'] = updated_at.get(wallet)
+    return wallet_data
+
+def build_selected_entry(wallet, chains, coins, balances, ticker):
+    # 简洁模式：只输出wallet和total_all_chains
+    if not chains:
+        return {
             'wallet': wallet,
-            'chains': {},
-            'total_in_usd': 0,
             'total_all_chains': balances.get(wallet, 0)
         }
-        total_in_wallet = 0
-        for chain in chains:
-            chain_coins = coins.get(chain, {}).get(wallet, [])
-            chain_list = []
-            total_in_chain_for_wallet = 0.0
-            for coin in chain_coins:
+
+    # 详细模式
+    wallet_data = {
+        'wallet': wallet,
+        'chains': {},
+        'total_in_usd': 0,
+        'total_all_chains': balances.get(wallet, 0)
+    }
+    total_in_wallet = 0
+    for chain in chains:
+        chain_coins = coins.get(chain, {}).get(wallet, [])
+        chain_list = []
+        for coin in chain_coins:
+            if coin['ticker'] == ticker:
                 coin_in_usd = 0 if coin["price"] is None else round(coin["amount"] * coin["price"], 2)
                 chain_list.append({
                     'ticker': coin['ticker'],
@@ -40,58 +74,63 @@ def save_full_to_json(wallets, chains, coins, balances, file_json):
                     'usd': coin_in_usd,
                     'contract_address': coin.get('contract_address', '')
                 })
-                if isinstance(coin_in_usd, (int, float)):
-                    total_in_wallet += coin_in_usd
-                    total_in_chain_for_wallet += coin_in_usd
-            wallet_data['chains'][chain] = {
-                'coins': chain_list,
-                'total_usd_in_chain': round(total_in_chain_for_wallet, 2)
-            }
-        wallet_data['total_in_usd'] = round(total_in_wallet, 2)
-        data.append(wallet_data)
+                total_in_wallet += coin_in_usd
+        wallet_data['chains'][chain] = chain_list
+    wallet_data['total_in_usd'] = total_in_wallet
+    return wallet_data
+
+def dump_json(data, file_json, compact=JSON_COMPACT):
     with open(file_json, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+        if compact:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        else:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+def save_full_to_json(wallets, chains, coins, balances, file_json, updated_at=None):
+    data = [build_full_entry(wallet, chains, coins, balances, updated_at) for wallet in wallets]
+    dump_json(data, file_json)
 
 def save_selected_to_json(wallets, chains, coins, balances, ticker, file_json):
-    # 简洁模式：只输出wallet和total_all_chains
-    if not chains:
-        data = []
-        for wallet in wallets:
-            data.append({
-                'wallet': wallet,
-                'total_all_chains': balances.get(wallet, 0)
-            })
-        with open(file_json, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        return
-    
-    # 详细模式
-    data = []
-    for wallet in wallets:
-        wallet_data = {
-            'wallet': wallet,
-            'chains': {},
-            'total_in_usd': 0,
-            'total_all_chains': balances.get(wallet, 0)
-        }
-        total_in_wallet = 0
-        for chain in chains:
-            chain_coins = coins.get(chain, {}).get(wallet, [])
-            chain_list = []
-            for coin in chain_coins:
-                if coin['ticker'] == ticker:
-                    coin_in_usd = 0 if coin["price"] is None else round(coin["amount"] * coin["price"], 2)
-                    chain_list.append({
-                        'ticker': coin['ticker'],
-                        'amount': coin['amount'],
-                        'price': coin['price'],
-                        'name': coin['name'],
-                        'usd': coin_in_usd,
-                        'contract_address': coin.get('contract_address', '')
-                    })
-                    total_in_wallet += coin_in_usd
-            wallet_data['chains'][chain] = chain_list
-        wallet_data['total_in_usd'] = total_in_wallet
-        data.append(wallet_data)
-    with open(file_json, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    data = [build_selected_entry(wallet, chains, coins, balances, ticker) for wallet in wallets]
+    dump_json(data, file_json)
+
+def load_entries(path):
+    """读取查询结果（balances.json 或 balances.ndjson），返回结果列表；文件不存在或格式错误时返回空列表"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if path.endswith('.ndjson'):
+                return [json.loads(line) for line in f if line.strip()]
+            return json.load(f)
+    except (OSError, ValueError):
+        return []
+
+def load_previous_balances(path):
+    """读取上一次的详细模式结果（balances.json 或 balances.ndjson），返回 {钱包: 结果}"""
+    data = load_entries(path)
+    return {
+        entry['wallet']: entry for entry in data
+        if isinstance(entry.get('chains'), dict)
+        and all(isinstance(chain, dict) for chain in entry['chains'].values())
+    }
+
+
+class BalanceStreamWriter:
+    """逐行写出 NDJSON：每个钱包的所有链都查询完成后立即写出一行，不必在内存中保留全部结果"""
+
+    def __init__(self, file_ndjson, chains, ticker=None):
+        self.chains = chains
+        self.ticker = ticker
+        self._file = open(file_ndjson, 'w', encoding='utf-8')
+
+    def write(self, wallet, coins, balances, updated_at=None, chains=None):
+        # chains 为该钱包要输出的链和池子，默认为创建时给出的列表
+        chains = self.chains if chains is None else chains
+        if self.ticker is None:
+            entry = build_full_entry(wallet, chains, coins, balances, updated_at)
+        else:
+            entry = build_selected_entry(wallet, chains, coins, balances, self.ticker)
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
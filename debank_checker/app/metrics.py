@@ -0,0 +1,178 @@
+import json
+import math
+import threading
+
+from contextlib import contextmanager
+from time import monotonic
+
+
+def percentile(values, p):
+    # values 需要已经排序；没有数据时返回 0
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index]
+
+
+class Histogram:
+    """按对数刻度分桶计数的直方图：每个桶比上一个宽约 9%，分位数的相对误差不超过一个桶宽，
+    内存只与样本的取值范围有关，不随请求数增长（长时间运行的 balance_server 也不会越来越大）"""
+
+    BUCKETS_PER_DOUBLING = 8
+    MIN_VALUE = 1e-4  # 小于 0.1 毫秒的样本都计入第一个桶
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def _bucket(cls, value):
+        if value <= cls.MIN_VALUE:
+            return 0
+        return max(0, math.ceil(math.log2(value / cls.MIN_VALUE) * cls.BUCKETS_PER_DOUBLING))
+
+    @classmethod
+    def _upper_bound(cls, bucket):
+        return cls.MIN_VALUE * 2 ** (bucket / cls.BUCKETS_PER_DOUBLING)
+
+    def observe(self, value):
+        bucket = self._bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        # 返回第 p 百分位样本所在桶的上界，不超过实际最大值
+        if not self.count:
+            return 0.0
+        rank = min(self.count - 1, int(round(p / 100 * (self.count - 1))))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen > rank:
+                return min(self._upper_bound(bucket), self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 4),
+            'p50': round(self.percentile(50), 4),
+            'p95': round(self.percentile(95), 4),
+            'max': round(self.max, 4),
+        }
+
+
+class Metrics:
+    """线程安全的计数器、直方图和阶段耗时，按接口和工作线程分别统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+            self._phases = {}
+            self._started = monotonic()
+
+    @staticmethod
+    def _worker():
+        return threading.current_thread().name
+
+    def inc(self, name, endpoint, amount=1):
+        key = (name, endpoint, self._worker())
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, endpoint, value):
+        key = (name, endpoint, self._worker())
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name, endpoint):
+        started = monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, endpoint, monotonic() - started)
+
+    def add_phase(self, name, seconds):
+        with self._lock:
+            self._phases[name] = self._phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name):
+        started = monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, monotonic() - started)
+
+    def counter(self, name, by='endpoint'):
+        """按接口（by='endpoint'）或工作线程（by='worker'）汇总某个计数器"""
+        index = 1 if by == 'endpoint' else 2
+        result = {}
+        with self._lock:
+            for key, value in self._counters.items():
+                if key[0] == name:
+                    result[key[index]] = result.get(key[index], 0) + value
+        return result
+
+    def histogram(self, name, by='endpoint'):
+        """按接口或工作线程合并某个直方图后计算分位数；by=None 时合并全部"""
+        merged = {}
+        with self._lock:
+            for key, histogram in self._histograms.items():
+                if key[0] != name:
+                    continue
+                group = None if by is None else key[1 if by == 'endpoint' else 2]
+                merged.setdefault(group, Histogram()).merge(histogram)
+        if by is None:
+            return merged.get(None, Histogram()).summary()
+        return {group: histogram.summary() for group, histogram in merged.items()}
+
+    def snapshot(self):
+        with self._lock:
+            counter_names = sorted({key[0] for key in self._counters})
+            histogram_names = sorted({key[0] for key in self._histograms})
+            phases = {name: round(seconds, 3) for name, seconds in self._phases.items()}
+            elapsed = monotonic() - self._started
+        return {
+            'elapsed': round(elapsed, 3),
+            'phases': phases,
+            'counters': {
+                name: {'by_endpoint': self.counter(name, 'endpoint'), 'by_worker': self.counter(name, 'worker')}
+                for name in counter_names
+            },
+            'histograms': {
+                name: {
+                    'all': self.histogram(name, None),
+                    'by_endpoint': self.histogram(name, 'endpoint'),
+                    'by_worker': self.histogram(name, 'worker'),
+                }
+                for name in histogram_names
+            },
+        }
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+
+
+# 进程内共享的统计数据，每次查询开始时清空
+metrics = Metrics()
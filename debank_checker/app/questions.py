@@ -6,18 +6,21 @@ def get_action():
     print(colored("🖐️ 请选择选项:", 'light_yellow'))
     print(colored("1. 💲 -获取钱包中所有EVM链的代币余额", 'light_blue'))
     print(colored("2. 🪙 -仅获取特定代币的余额", 'light_blue'))
-    print(colored("3. 📖 -帮助", 'light_blue'))
-    print(colored("4. 📤 -退出", 'light_blue'))
+    print(colored("3. 🔄 -增量刷新（仅重新扫描总余额有变化的钱包）", 'light_blue'))
+    print(colored("4. 📖 -帮助", 'light_blue'))
+    print(colored("5. 📤 -退出", 'light_blue'))
     
     while True:
-        choice = input(colored("请输入选项 (1-4): ", 'yellow')).strip()
+        choice = input(colored("请输入选项 (1-5): ", 'yellow')).strip()
         if choice == "1":
             return "💲 -获取钱包中所有EVM链的代币余额"
         elif choice == "2":
             return "🪙 -仅获取特定代币的余额"
         elif choice == "3":
-            return "📖 -帮助"
+            return "🔄 -增量刷新"
         elif choice == "4":
+            return "📖 -帮助"
+        elif choice == "5":
             return "📤 -退出"
         else:
             print(colored("❌ 无效选项，请重新输入", 'red'))
@@ -69,7 +72,7 @@ def get_minimal_amount_in_usd():
 
 def get_num_of_threads():
     while True:
-        num_of_threads = input(colored("✍️  工作线程数量（如果你有超过100个地址，请只设置1个线程）: ", 'yellow')).strip()
+        num_of_threads = input(colored("✍️  工作线程数量（所有线程共享 MAX_REQUESTS_PER_SECOND 请求预算，默认 1）: ", 'yellow')).strip()
         if not num_of_threads:
             num_of_threads = "1"
         
@@ -82,3 +85,12 @@ def get_num_of_threads():
     if num_of_threads == 0:
         num_of_threads = 3
     return num_of_threads
+
+def get_resume_choice(completed):
+    while True:
+        choice = input(colored(f"♻️  检测到上次未完成的查询（已完成 {completed} 项），是否从断点继续？(y/n，默认 y): ", 'yellow')).strip().lower()
+        if choice in ("", "y", "yes"):
+            return True
+        if choice in ("n", "no"):
+            return False
+        print(colored("❌ 无效选项，请重新输入", 'red'))
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+
+from time import monotonic, sleep
+
+from .config import *
+
+
+class RateLimiter:
+    """线程安全的令牌桶：所有线程（以及异步模式下的所有协程）共享同一份请求预算"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """取一个令牌，成功返回 0，否则返回还需要等待的秒数"""
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait_time = self._take()
+            if not wait_time:
+                return
+            sleep(wait_time)
+
+    async def acquire_async(self):
+        # 与 acquire 共用同一个令牌桶，线程和协程可以共享同一份请求预算
+        while True:
+            wait_time = self._take()
+            if not wait_time:
+                return
+            await asyncio.sleep(wait_time)
+
+
+# 所有线程、所有接口共用的请求预算，避免触发 Cloudflare 限制
+request_budget = RateLimiter(MAX_REQUESTS_PER_SECOND)
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """按接口自适应调整速率的令牌桶：响应正常时线性加速，遇到 429 时成倍减速（AIMD）"""
+
+    def __init__(self, rate, min_rate, max_rate, increase, decrease):
+        super().__init__(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+
+    def on_success(self):
+        with self._lock:
+            # 每秒大约增加 increase，而不是每个请求都增加，避免高速率时增长过快
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttled(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            # 清空令牌，所有线程都要按新的速率重新排队
+            self._tokens = 0
+            self._updated = monotonic()
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(path, proxy=None, budget_rate=None):
+    """返回某个接口路径共享的自适应限速器；使用代理时每个 (代理, 接口) 各有一个限速器。
+    每个请求还要从请求预算中取令牌，budget_rate 为该预算的速率，限速器的速率不会超过它"""
+    key = path if proxy is None else f'{path}@{proxy}'
+    max_rate = RATE_MAX if budget_rate is None else min(RATE_MAX, budget_rate)
+    with _limiters_lock:
+        if key not in _limiters:
+            _limiters[key] = AdaptiveRateLimiter(
+                min(RATE_INITIAL, max_rate), min(RATE_MIN, max_rate), max_rate, RATE_INCREASE, RATE_DECREASE
+            )
+        return _limiters[key]
+
+
+def reset_limiters():
+    """丢弃所有接口的限速器，下次请求时按当前配置重新创建"""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def current_rates():
+    """返回各接口当前的请求速率（次/秒），用于调整运行参数"""
+    with _limiters_lock:
+        return {path: round(limiter.rate, 2) for path, limiter in _limiters.items()}
@@ -0,0 +1,163 @@
+import sys
+import heapq
+
+from termcolor import colored
+
+from .config import *
+
+try:
+    from tabulate import tabulate
+except ImportError:
+    tabulate = None
+
+# 余额分布统计的区间（美元），最后一档为 “>= 最后一个值”
+BALANCE_BUCKETS = (1, 100, 1000, 10000)
+
+
+def summarize(balances, top_n):
+    """一次遍历计算汇总信息，并取出余额最高的 top_n 个钱包，开销与钱包数量线性相关"""
+    total_balance = 0.0
+    nonzero = 0
+    buckets = [0] * (len(BALANCE_BUCKETS) + 1)
+    for value in balances.values():
+        total_balance += value
+        if value > 0:
+            nonzero += 1
+        for i, bound in enumerate(BALANCE_BUCKETS):
+            if value < bound:
+                buckets[i] += 1
+                break
+        else:
+            buckets[-1] += 1
+
+    top = heapq.nlargest(top_n, balances.items(), key=lambda item: item[1]) if top_n > 0 else []
+    return {
+        'total_wallets': len(balances),
+        'total_balance': total_balance,
+        'nonzero_wallets': nonzero,
+        'buckets': buckets,
+        'top': top,
+        'top_balance': sum(value for _, value in top),
+    }
+
+
+def print_cards(summary):
+    total_wallets = summary['total_wallets']
+    total_balance = summary['total_balance']
+
+    # 统计信息卡片
+    print(colored("╭" + "─"*25 + "╮" + " " + "╭" + "─"*25 + "╮", "magenta"))
+    print(colored("│", "magenta") + colored(f"  💼 钱包总数", "yellow", attrs=["bold"]) + colored(" "*12, "magenta") + colored("│", "magenta") +
+          colored(" │", "magenta") + colored(f"  💰 总余额", "yellow", attrs=["bold"]) + colored(" "*14, "magenta") + colored("│", "magenta"))
+    print(colored("│", "magenta") + colored(f"  {total_wallets:>8}", "white", attrs=["bold"]) + colored(" "*15, "magenta") + colored("│", "magenta") +
+          colored(" │", "magenta") + colored(f"  ${total_balance:>10.2f}", "magenta", attrs=["bold"]) + colored(" "*12, "magenta") + colored("│", "magenta"))
+    print(colored("╰" + "─"*25 + "╯" + " " + "╰" + "─"*25 + "╯", "magenta"))
+    print()
+
+    print(colored("╭" + "─"*25 + "╮", "magenta"))
+    print(colored("│", "magenta") + colored(f"  🎯 有余额钱包", "yellow", attrs=["bold"]) + colored(" "*10, "magenta") + colored("│", "magenta"))
+    print(colored("│", "magenta") + colored(f"  {summary['nonzero_wallets']:>8}", "white", attrs=["bold"]) + colored(" "*15, "magenta") + colored("│", "magenta"))
+    print(colored("╰" + "─"*25 + "╯", "magenta"))
+    print()
+
+    # 余额分布
+    labels = [f"< ${BALANCE_BUCKETS[0]}"]
+    labels += [f"${low}-{high}" for low, high in zip(BALANCE_BUCKETS, BALANCE_BUCKETS[1:])]
+    labels.append(f">= ${BALANCE_BUCKETS[-1]}")
+    distribution = '  '.join(f"{label}: {count}" for label, count in zip(labels, summary['buckets']))
+    print(colored("📊  余额分布  ", "cyan", attrs=["bold"]) + colored(distribution, "white"))
+    print()
+
+
+def print_table(rows):
+    """打印 (钱包, 余额) 行，每行的数值只格式化一次"""
+    if tabulate is not None:
+        headers = [
+            colored("钱包地址", "cyan", attrs=["bold"]),
+            colored("余额(USD)", "cyan", attrs=["bold"]),
+            colored("状态", "cyan", attrs=["bold"])
+        ]
+        colored_table_data = []
+        for wallet, value in rows:
+            positive = value > 0
+            colored_table_data.append([
+                colored(wallet, "yellow" if positive else "grey", attrs=["bold"]),
+                colored(f"${value:.2f}", "magenta" if positive else "red", attrs=["bold"]),
+                colored("✅" if positive else "❌", "green" if positive else "red")
+            ])
+        print(tabulate(
+            colored_table_data,
+            headers=headers,
+            tablefmt="grid",
+            stralign="left",
+            numalign="right"
+        ))
+        return
+
+    # 自定义表格格式
+    print(colored("┌" + "─"*44 + "┬" + "─"*15 + "┬" + "─"*8 + "┐", "cyan"))
+    print(colored("│", "cyan") + colored(f"{'钱包地址':^44}", "cyan", attrs=["bold"]) +
+          colored("│", "cyan") + colored(f"{'余额(USD)':^15}", "cyan", attrs=["bold"]) +
+          colored("│", "cyan") + colored(f"{'状态':^8}", "cyan", attrs=["bold"]) + colored("│", "cyan"))
+    print(colored("├" + "─"*44 + "┼" + "─"*15 + "┼" + "─"*8 + "┤", "cyan"))
+
+    for wallet, value in rows:
+        # 地址设置为黄色，余额设置为紫色
+        balance = f"${value:.2f}"
+        if value > 0:
+            addr_str = colored(f"{wallet:^44}", "yellow", attrs=["bold"])
+            bal_str = colored(f"{balance:^15}", "magenta", attrs=["bold"])
+            status_str = colored(f"{'✅':^8}", "green")
+        else:
+            addr_str = colored(f"{wallet:^44}", "grey")
+            bal_str = colored(f"{balance:^15}", "red")
+            status_str = colored(f"{'❌':^8}", "red")
+        print(colored("│", "cyan") + addr_str + colored("│", "cyan") + bal_str + colored("│", "cyan") + status_str + colored("│", "cyan"))
+
+    print(colored("└" + "─"*44 + "┴" + "─"*15 + "┴" + "─"*8 + "┘", "cyan"))
+
+
+def page_rest(balances, skip, page_size):
+    """在终端中按页显示前 skip 个之外的钱包，用户输入 q 时停止；只在用户翻页时才对全部钱包排序"""
+    ranked = sorted(balances.items(), key=lambda item: item[1], reverse=True)
+    for start in range(skip, len(ranked), page_size):
+        remaining = len(ranked) - start
+        answer = input(colored(
+            f"📄  还有 {remaining} 个钱包未显示，按回车查看下一页（每页 {page_size} 个），输入 q 结束: ", "yellow"
+        )).strip().lower()
+        if answer == 'q':
+            return
+        print_table(ranked[start:start + page_size])
+        print()
+
+
+def render_summary(balances, output_file, top_n=None, page_size=None):
+    """打印统计结果：汇总卡片、余额分布和余额最高的 top_n 个钱包；
+    其余钱包在交互终端中分页显示，否则只提示去结果文件中查看，输出量不随钱包数量增长"""
+    top_n = SUMMARY_TOP_N if top_n is None else top_n
+    page_size = SUMMARY_PAGE_SIZE if page_size is None else page_size
+    if tabulate is None:
+        logger.warning("未安装 tabulate 库，表格美化功能不可用。可通过 pip install tabulate 安装。")
+
+    summary = summarize(balances, top_n)
+    print_cards(summary)
+
+    top = summary['top']
+    if top:
+        if len(top) < summary['total_wallets']:
+            share = summary['top_balance'] / summary['total_balance'] * 100 if summary['total_balance'] > 0 else 0
+            print(colored(f"📋  余额最高的 {len(top)} 个钱包（占总余额 {share:.1f}%）", "cyan", attrs=["bold"]))
+        else:
+            print(colored("📋  详细余额列表", "cyan", attrs=["bold"]))
+        print()
+        print_table(top)
+        print()
+
+    rest = summary['total_wallets'] - len(top)
+    if rest <= 0:
+        return
+    if page_size > 0 and sys.stdin.isatty() and sys.stdout.isatty():
+        page_rest(balances, len(top), page_size)
+    else:
+        print(colored(f"📄  其余 {rest} 个钱包的余额请查看 {output_file}", "yellow"))
+        print()
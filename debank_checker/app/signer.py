@@ -0,0 +1,365 @@
+import re
+import json
+import math
+import base64
+import itertools
+import subprocess
+import threading
+
+from collections import deque
+from concurrent.futures import Future
+from time import time, monotonic
+
+from .config import *
+
+try:
+    import wasmtime
+except ImportError:
+    wasmtime = None
+
+
+class NodeSigner:
+    """常驻的 node 签名服务，所有线程共享一个进程，按请求 ID 关联签名结果"""
+
+    def __init__(self, js_path=file_js):
+        self._process = subprocess.Popen(
+            ['node', js_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            bufsize=1,
+        )
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._reader = threading.Thread(target=self._read_loop, name='node-signer-reader', daemon=True)
+        self._reader.start()
+
+    def sign_async(self, payload, method, path, nonce=None, ts=None):
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('签名服务已关闭')
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            request = {'id': request_id, 'payload': payload, 'method': method, 'path': path}
+            if nonce is not None:
+                request['nonce'] = nonce
+            if ts is not None:
+                request['ts'] = ts
+            try:
+                self._process.stdin.write(json.dumps(request) + '\n')
+                self._process.stdin.flush()
+            except Exception:
+                self._pending.pop(request_id, None)
+                raise
+        return future
+
+    def sign(self, payload, method, path, nonce=None, ts=None):
+        return self.sign_async(payload, method, path, nonce, ts).result(timeout=SIGNER_TIMEOUT)
+
+    def _read_loop(self):
+        for line in self._process.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                response = json.loads(line)
+            except ValueError:
+                logger.error(f'签名服务返回了无法解析的数据: {line}')
+                continue
+
+            with self._lock:
+                future = self._pending.pop(response.pop('id', None), None)
+            if future is None:
+                continue
+            if 'error' in response:
+                future.set_exception(RuntimeError(f"签名失败: {response['error']}"))
+            else:
+                future.set_result(response)
+
+        # node 进程退出后，让所有还在等待的请求立即失败，而不是等到超时
+        with self._lock:
+            self._closed = True
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(RuntimeError('签名服务进程已退出'))
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+
+
+class WasmSigner:
+    """在当前进程内执行 js/main.js 中同一个 WASM 签名模块，不需要 node 子进程"""
+
+    SIGN_TYPE = 100120
+    NONCE_LENGTH = 40
+    SIGNATURE_LENGTH = 64
+
+    def __init__(self, js_path=file_js):
+        if wasmtime is None:
+            raise RuntimeError('未安装 wasmtime 库，无法使用进程内签名。可通过 pip install wasmtime 安装。')
+
+        with open(js_path, 'r', encoding='utf-8') as f:
+            match = re.search(r'g = "([A-Za-z0-9+/=]+)"', f.read())
+        if match is None:
+            raise RuntimeError(f'未在 {js_path} 中找到 WASM 模块')
+
+        engine = wasmtime.Engine()
+        self._store = wasmtime.Store(engine)
+        module = wasmtime.Module(engine, base64.b64decode(match.group(1)))
+
+        # 与 js/main.js 中的导入对象保持一致
+        handlers = {
+            ('env', 'iR'): lambda: 0,
+            ('env', 'hNHD'): lambda: 1,
+            ('wasi_snapshot_preview1', 'fd_close'): lambda *args: 0,
+            ('wasi_snapshot_preview1', 'fd_write'): lambda *args: 0,
+            ('wasi_snapshot_preview1', 'fd_seek'): lambda *args: 0,
+        }
+        imports = []
+        for item in module.imports:
+            handler = handlers.get((item.module, item.name))
+            if handler is None:
+                raise RuntimeError(f'WASM 模块需要未知的导入: {item.module}.{item.name}')
+            imports.append(wasmtime.Func(self._store, item.type, handler))
+
+        self._exports = wasmtime.Instance(self._store, module, imports).exports(self._store)
+        self._memory = self._exports['memory']
+        self._heap_base = self._exports['__heap_base'].value(self._store)
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _call(self, name, *args):
+        return self._exports[name](self._store, *args)
+
+    def _reserve(self, size):
+        # 对应 js/main.js 中的 y()：内存不足时先扩容
+        missing = self._heap_base + 4 * size - self._memory.data_len(self._store)
+        if missing > 0:
+            self._memory.grow(self._store, math.ceil(missing / 65536))
+
+    def _alloc(self, size):
+        self._reserve(size)
+        return self._call('malloc', size)
+
+    def _write_string(self, text):
+        data = text.encode('utf-8')
+        ptr = self._alloc(len(data) + 1)
+        self._memory.write(self._store, data + b'\0', ptr)
+        return ptr
+
+    def _read_string(self, ptr, length):
+        try:
+            return bytes(self._memory.read(self._store, ptr, ptr + length)).decode('utf-8')
+        finally:
+            self._call('free', ptr)
+
+    def _nonce(self):
+        ptr = self._alloc(self.NONCE_LENGTH)
+        self._call('r_s', self.NONCE_LENGTH, ptr)
+        nonce = self._read_string(ptr, self.NONCE_LENGTH)
+
+        type_ptr = self._alloc(4)
+        self._call('get_sign_type', type_ptr)
+        sign_type = int.from_bytes(bytes(self._memory.read(self._store, type_ptr, type_ptr + 4)), 'little')
+        self._call('free', type_ptr)
+
+        return f'nc_{nonce}' if sign_type == 100121 else f'n_{nonce}'
+
+    @staticmethod
+    def _query_string(payload):
+        # 与 js/main.js 中的 I() 相同：按键排序，None 转为空字符串
+        def to_js_string(value):
+            if value is None:
+                return ''
+            if isinstance(value, bool):
+                return 'true' if value else 'false'
+            return str(value)
+
+        return '&'.join(f'{key}={to_js_string(payload[key])}' for key in sorted(payload))
+
+    def sign(self, payload, method, path, nonce=None, ts=None):
+        with self._lock:
+            self._call('set_sign_type', self.SIGN_TYPE)
+            nonce = nonce or self._nonce()
+            ts = ts or int(time())
+
+            out_ptr = self._alloc(self.SIGNATURE_LENGTH)
+            ptrs = [
+                self._write_string(method.upper()),
+                self._write_string(path),
+                self._write_string(self._query_string(payload)),
+                self._write_string(nonce),
+                self._write_string(str(ts)),
+            ]
+            length = self._call('mk_s_f', *ptrs, out_ptr)
+            for ptr in ptrs:
+                self._call('free', ptr)
+            signature = self._read_string(out_ptr, length)
+
+        return {
+            'signature': signature,
+            'nonce': nonce,
+            'ts': ts,
+            'version': 'v2'
+        }
+
+    def sign_async(self, payload, method, path, nonce=None, ts=None):
+        future = Future()
+        try:
+            future.set_result(self.sign(payload, method, path, nonce, ts))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def close(self):
+        self._closed = True
+
+
+class PrefetchingSigner:
+    """签名预取：按任务队列的顺序提前为即将发送的请求生成签名，工作线程直接取用，签名不再占用请求的关键路径"""
+
+    def __init__(self, signer, depth=SIGN_PREFETCH_DEPTH, max_age=SIGN_MAX_AGE):
+        self._signer = signer
+        self.depth = depth
+        self.max_age = max_age
+        self._upcoming = deque()
+        self._ready = {}
+        self._ready_count = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._prefetch_loop, name='signature-prefetch', daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def _key(payload, method, path):
+        return method.upper(), path, tuple(sorted(payload.items()))
+
+    def schedule(self, payload, method, path):
+        """登记一个即将发送的请求，由后台线程在签名有效期内提前签名。
+        调用方（main.TaskQueue）只登记任务队列队首的 depth 个任务，登记数量因此有上限"""
+        with self._cond:
+            self._upcoming.append((payload, method, path))
+            self._cond.notify()
+
+    def _purge_expired(self):
+        now = monotonic()
+        for key in list(self._ready):
+            ready = self._ready[key]
+            while ready and now - ready[0][0] > self.max_age:
+                ready.popleft()
+                self._ready_count -= 1
+            if not ready:
+                del self._ready[key]
+
+    def _prefetch_loop(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._upcoming or self._ready_count >= self.depth):
+                    # 定期清理过期且没有被取用的签名（例如请求命中了缓存），腾出预取名额
+                    self._cond.wait(timeout=1)
+                    self._purge_expired()
+                if self._closed:
+                    return
+                payload, method, path = self._upcoming.popleft()
+                self._ready_count += 1
+
+            try:
+                future = self._signer.sign_async(payload, method, path)
+            except Exception as error:
+                future = Future()
+                future.set_exception(error)
+
+            with self._cond:
+                self._ready.setdefault(self._key(payload, method, path), deque()).append((monotonic(), future))
+
+    def _take(self, payload, method, path):
+        with self._cond:
+            self._purge_expired()
+            ready = self._ready.get(self._key(payload, method, path))
+            if not ready:
+                return None
+            _, future = ready.popleft()
+            self._ready_count -= 1
+            self._cond.notify()
+            return future
+
+    def sign(self, payload, method, path, nonce=None, ts=None):
+        if nonce is None and ts is None:
+            future = self._take(payload, method, path)
+            if future is not None:
+                try:
+                    return future.result(timeout=SIGNER_TIMEOUT)
+                except Exception as error:
+                    logger.warning(f'预取的签名不可用，重新签名: {error}')
+        return self._signer.sign(payload, method, path, nonce, ts)
+
+    def sign_async(self, payload, method, path, nonce=None, ts=None):
+        # 异步客户端通过 sign_async 签名，同样优先取用预取的签名
+        if nonce is None and ts is None:
+            future = self._take(payload, method, path)
+            if future is not None:
+                return future
+        return self._signer.sign_async(payload, method, path, nonce, ts)
+
+    @property
+    def closed(self):
+        return self._closed or self._signer.closed
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._signer.close()
+
+
+_signer = None
+_signer_lock = threading.Lock()
+
+
+def create_signer(backend=SIGNER_BACKEND):
+    if backend == 'wasm':
+        try:
+            return WasmSigner()
+        except Exception as error:
+            logger.warning(f'进程内签名不可用，改用 node 签名服务: {error}')
+    return NodeSigner()
+
+
+def get_signer():
+    """返回进程内共享的签名服务，首次调用时启动"""
+    global _signer
+    with _signer_lock:
+        if _signer is None or _signer.closed:
+            _signer = create_signer()
+            if SIGN_PREFETCH:
+                _signer = PrefetchingSigner(_signer)
+        return _signer
+
+
+def close_signer():
+    """关闭共享的签名服务（如果已经启动）"""
+    global _signer
+    with _signer_lock:
+        if _signer is not None:
+            _signer.close()
+            _signer = None
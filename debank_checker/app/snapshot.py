@@ -0,0 +1,186 @@
+import sqlite3
+
+from datetime import datetime
+
+from .config import *
+from .json import build_full_entry, build_selected_entry
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    mode TEXT NOT NULL,
+    ticker TEXT,
+    min_amount REAL,
+    wallet_count INTEGER NOT NULL DEFAULT 0,
+    total_usd REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS wallets (
+    run_id INTEGER NOT NULL,
+    wallet TEXT NOT NULL,
+    total_usd REAL,
+    total_all_chains REAL,
+    updated_at TEXT,
+    PRIMARY KEY (run_id, wallet)
+);
+CREATE TABLE IF NOT EXISTS chain_tokens (
+    run_id INTEGER NOT NULL,
+    wallet TEXT NOT NULL,
+    chain TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    ticker TEXT,
+    name TEXT,
+    amount REAL,
+    price REAL,
+    usd REAL
+);
+CREATE TABLE IF NOT EXISTS pools (
+    run_id INTEGER NOT NULL,
+    wallet TEXT NOT NULL,
+    pool TEXT NOT NULL,
+    chain TEXT NOT NULL,
+    contract TEXT NOT NULL,
+    ticker TEXT,
+    name TEXT,
+    amount REAL,
+    price REAL,
+    usd REAL
+);
+CREATE INDEX IF NOT EXISTS idx_wallets_wallet ON wallets (wallet, run_id);
+CREATE INDEX IF NOT EXISTS idx_chain_tokens_wallet ON chain_tokens (wallet, run_id);
+CREATE INDEX IF NOT EXISTS idx_chain_tokens_contract ON chain_tokens (run_id, chain, contract);
+CREATE INDEX IF NOT EXISTS idx_chain_tokens_ticker ON chain_tokens (run_id, ticker, chain);
+CREATE INDEX IF NOT EXISTS idx_pools_wallet ON pools (wallet, run_id);
+CREATE INDEX IF NOT EXISTS idx_pools_contract ON pools (run_id, chain, contract);
+'''
+
+
+def split_pool_name(name):
+    """池子在结果中以 “名称 (链)” 的形式和链放在一起，返回 (名称, 链)；普通链返回 None"""
+    if not name.endswith(')') or ' (' not in name:
+        return None
+    pool, _, chain = name[:-1].rpartition(' (')
+    return pool, chain
+
+
+def now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class SnapshotStore:
+    """把每次查询结果保存到 SQLite（balances.db），按钱包、链和合约地址建立索引，
+    跨批次的查询（某个代币的持有者、两次查询之间的变化）只需要查索引，不用重新读取整个 balances.json"""
+
+    def __init__(self, path=file_snapshot):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    @property
+    def conn(self):
+        return self._conn
+
+    def start_run(self, mode, ticker=None, min_amount=None):
+        cursor = self._conn.execute(
+            'INSERT INTO runs (started_at, mode, ticker, min_amount) VALUES (?, ?, ?, ?)',
+            (now(), mode, ticker, min_amount)
+        )
+        self._conn.commit()
+        return cursor.lastrowid
+
+    def add_entry(self, run_id, entry):
+        """写入一个钱包的结果（与 balances.json 中的一项格式相同），在 finish_run 或 commit 时提交"""
+        wallet = entry['wallet']
+        self._conn.execute(
+            'INSERT OR REPLACE INTO wallets (run_id, wallet, total_usd, total_all_chains, updated_at) VALUES (?, ?, ?, ?, ?)',
+            (run_id, wallet, entry.get('total_in_usd'), entry.get('total_all_chains'), entry.get('updated_at'))
+        )
+        token_rows = []
+        pool_rows = []
+        for name, chain_data in entry.get('chains', {}).items():
+            # 详细模式为 {'coins': [...], ...}，特定代币模式直接是代币列表
+            chain_coins = chain_data['coins'] if isinstance(chain_data, dict) else chain_data
+            pool = split_pool_name(name)
+            for coin in chain_coins:
+                values = (
+                    coin.get('contract_address', ''), coin['ticker'], coin['name'], coin['amount'], coin['price'],
+                    coin['usd']
+                )
+                if pool is None:
+                    token_rows.append((run_id, wallet, name) + values)
+                else:
+                    pool_rows.append((run_id, wallet, pool[0], pool[1]) + values)
+        if token_rows:
+            self._conn.executemany(
+                'INSERT INTO chain_tokens (run_id, wallet, chain, contract, ticker, name, amount, price, usd) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                token_rows
+            )
+        if pool_rows:
+            self._conn.executemany(
+                'INSERT INTO pools (run_id, wallet, pool, chain, contract, ticker, name, amount, price, usd) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                pool_rows
+            )
+
+    def commit(self):
+        self._conn.commit()
+
+    def finish_run(self, run_id):
+        # 只有正常结束的批次才有 finished_at，查询默认忽略中断的批次
+        self._conn.execute(
+            'UPDATE runs SET finished_at = ?, '
+            'wallet_count = (SELECT COUNT(*) FROM wallets WHERE run_id = ?), '
+            'total_usd = (SELECT COALESCE(SUM(total_all_chains), 0) FROM wallets WHERE run_id = ?) '
+            'WHERE id = ?',
+            (now(), run_id, run_id, run_id)
+        )
+        self._conn.commit()
+
+    def latest_runs(self, count=2, mode=None):
+        """最近正常结束的批次 ID，从新到旧"""
+        sql = 'SELECT id FROM runs WHERE finished_at IS NOT NULL'
+        params = []
+        if mode is not None:
+            sql += ' AND mode = ?'
+            params.append(mode)
+        sql += ' ORDER BY id DESC LIMIT ?'
+        params.append(count)
+        return [row[0] for row in self._conn.execute(sql, params)]
+
+    def close(self):
+        self._conn.close()
+
+
+class SnapshotWriter:
+    """与 BalanceStreamWriter 相同的接口：每个钱包完成后写入 balances.db，每 COMMIT_INTERVAL 个钱包提交一次"""
+
+    COMMIT_INTERVAL = 500
+
+    def __init__(self, chains, ticker=None, min_amount=None, path=file_snapshot):
+        self.chains = chains
+        self.ticker = ticker
+        self._store = SnapshotStore(path)
+        mode = 'total' if not chains else ('full' if ticker is None else 'ticker')
+        self.run_id = self._store.start_run(mode, ticker, min_amount)
+        self._pending = 0
+
+    def write(self, wallet, coins, balances, updated_at=None, chains=None):
+        chains = self.chains if chains is None else chains
+        if self.ticker is None:
+            entry = build_full_entry(wallet, chains, coins, balances, updated_at)
+        else:
+            entry = build_selected_entry(wallet, chains, coins, balances, self.ticker)
+        self._store.add_entry(self.run_id, entry)
+        self._pending += 1
+        if self._pending >= self.COMMIT_INTERVAL:
+            self._store.commit()
+            self._pending = 0
+
+    def close(self):
+        self._store.finish_run(self.run_id)
+        self._store.close()
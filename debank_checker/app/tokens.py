@@ -0,0 +1,97 @@
+import threading
+
+
+class Token:
+    """代币元数据，同一条链上的同一个合约在进程内只保存一份"""
+
+    __slots__ = ('chain', 'contract', 'name', 'ticker', 'price', 'logo_url')
+
+    def __init__(self, chain, contract, name, ticker, price, logo_url):
+        self.chain = chain
+        self.contract = contract
+        self.name = name
+        self.ticker = ticker
+        self.price = price
+        self.logo_url = logo_url
+
+
+class Holding:
+    """钱包持有的某个代币：只保存代币引用和数量，其余字段从代币表读取。
+    支持 coin['amount']、coin.get('contract_address') 等字典写法，输出代码不需要区分"""
+
+    __slots__ = ('token', 'amount')
+
+    def __init__(self, token, amount):
+        self.token = token
+        self.amount = amount
+
+    def __getitem__(self, key):
+        if key == 'amount':
+            return self.amount
+        if key == 'contract_address':
+            return self.token.contract
+        try:
+            return getattr(self.token, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        return {
+            'amount': self.amount,
+            'name': self.token.name,
+            'ticker': self.token.ticker,
+            'price': self.token.price,
+            'logo_url': self.token.logo_url,
+            'contract_address': self.token.contract,
+        }
+
+
+class TokenTable:
+    """按 (链, 合约地址) 去重的代币表：内存占用随不同代币的数量增长，而不是随 钱包 × 代币 增长"""
+
+    def __init__(self):
+        self._tokens = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tokens)
+
+    def intern(self, chain, contract, name, ticker, price, logo_url, update_price=True):
+        key = (chain, contract)
+        token = self._tokens.get(key)
+        if token is None:
+            with self._lock:
+                token = self._tokens.setdefault(key, Token(chain, contract, name, ticker, price, logo_url))
+        elif update_price:
+            # 同一个代币的价格以最近一次 DeBank 返回的为准
+            token.price = price
+        return token
+
+    def holding(self, chain, coin):
+        """把 DeBank 返回的代币对象转换为 Holding"""
+        token = self.intern(
+            coin.get('chain') or chain, coin.get('id', ''), coin['name'], coin['optimized_symbol'], coin['price'],
+            coin.get('logo_url'),
+        )
+        return Holding(token, coin['amount'])
+
+    def from_dict(self, chain, coin):
+        """把断点日志或上次结果中的代币字典转换为 Holding"""
+        if isinstance(coin, Holding):
+            return coin
+        # 旧记录中的价格可能已经过时，不覆盖本次查询得到的价格
+        token = self.intern(
+            chain, coin.get('contract_address', ''), coin['name'], coin['ticker'], coin['price'], coin.get('logo_url'),
+            update_price=False,
+        )
+        return Holding(token, coin['amount'])
+
+
+# 进程内共享的代币表
+token_table = TokenTable()
@@ -1,31 +1,49 @@
 import random
-import subprocess
 import requests
 import tls_client
 import json
 
 from time import time, sleep
+from urllib.parse import urlparse, urlencode
 from .config import *
-
-
-
-def generate_req_rapams(node_process, payload, method, path):
-    _json = json.dumps(payload)
-
-    node_process.stdin.write(f'{_json}|{method}|{path}')
-    sleep(NODE_SLEEP_TIME)
-    node_process.stdin.flush()
-    output_data = node_process.stdout.readline().strip()
-    signature = json.loads(output_data)
-
-    return signature
-
-def edit_session_headers(node_process, session, payload, method, path):
-    sig = generate_req_rapams(node_process, payload, method, path)
-    session.headers['x-api-nonce'] = sig['nonce']
-    session.headers['x-api-sign'] = sig['signature']
-    session.headers['x-api-ts'] = str(sig['ts'])
-
+from .signer import get_signer
+from .ratelimit import request_budget, get_limiter
+from .cache import get_cache, ResponseCache
+from .coalesce import request_memo
+from .metrics import metrics
+from .proxy import get_proxy_pool
+
+
+# 与 Chrome 112 一致的浏览器请求头，线程模式的 tls_client 会话和异步客户端共用
+DEBANK_HEADERS = {
+    'authority': 'api.debank.com',
+    'accept': '*/*',
+    'accept-language': 'ru-RU,ru;q=0.9',
+    'cache-control': 'no-cache',
+    'origin': 'https://debank.com',
+    'pragma': 'no-cache',
+    'referer': 'https://debank.com/',
+    'sec-ch-ua': '"Chromium";v="112", "Google Chrome";v="112", "Not:A-Brand";v="99"',
+    'sec-ch-ua-mobile': '?0',
+    'sec-ch-ua-platform': '"Linux"',
+    'sec-fetch-dest': 'empty',
+    'sec-fetch-mode': 'cors',
+    'sec-fetch-site': 'same-site',
+    'source': 'web',
+    'user-agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36',
+    'x-api-nonce': 'n_RT2KhwQF08JA3CwiTUOhUnel9ELZPGHDb2UgZLKh',
+    'x-api-sign': 'fb69dcdb900a27540c6fd9e13a08db75d16a2b917cfc33991e834552691a1a72',
+    'x-api-ts': '1690894427',
+    'x-api-ver': 'v2',
+}
+
+
+def generate_req_rapams(signer, payload, method, path):
+    with metrics.timer('sign_seconds', path):
+        return signer.sign(payload, method, path)
+
+def signed_headers(sig):
+    """签名结果和随机账户信息对应的请求头"""
     abc = 'abcdef0123456789'
     r_id = ''.join(random.choices(abc, k=32))
     r_time = str(int(time()))
@@ -34,57 +52,143 @@ def edit_session_headers(node_process, session, payload, method, path):
         'random_id': r_id,
         'user_addr': None
     }
-    account = json.dumps(info)
-    session.headers['account'] = account
+    return {
+        'x-api-nonce': sig['nonce'],
+        'x-api-sign': sig['signature'],
+        'x-api-ts': str(sig['ts']),
+        'account': json.dumps(info),
+    }
 
-def send_request(node_process, session, method, url, payload={}, params={}, max_retries=3):
+def edit_session_headers(signer, session, payload, method, path):
+    sig = generate_req_rapams(signer, payload, method, path)
+    session.headers.update(signed_headers(sig))
+
+def send_request(signer, session, method, url, payload={}, params={}, max_retries=3):
     retry_count = 0
     base_delay = SLEEP_TIME
+    path = urlparse(url).path
+    proxy_pool = get_proxy_pool()
     
     while retry_count < max_retries:
-        # 使用指数退避策略计算延迟时间
-        current_delay = base_delay * (2 ** retry_count) + random.uniform(0, 0.5)
-        sleep(current_delay)
+        # 请求节奏由该接口的自适应限速器和请求预算决定，不再每次请求前固定休眠；
+        # 使用代理时预算和限速器都按代理独立计算，每次重试前重新确认会话所用的代理
+        proxy = proxy_pool.proxy_for(session) if proxy_pool is not None else None
+        budget = proxy.budget if proxy is not None else request_budget
+        limiter = get_limiter(path, proxy.name if proxy is not None else None, budget.rate)
+        with metrics.timer('ratelimit_wait_seconds', path):
+            limiter.acquire()
+            budget.acquire()
         
         try:
-            if (method == 'GET'):
-                resp = session.execute_request(method=method, url=url)
-            else:
-                resp = session.request(method=method, url=url, json=payload, params=params)
+            metrics.inc('requests', path)
+            with metrics.timer('http_seconds', path):
+                if (method == 'GET'):
+                    resp = session.execute_request(method=method, url=url)
+                else:
+                    resp = session.request(method=method, url=url, json=payload, params=params)
 
             if (resp.status_code == 200):
+                limiter.on_success()
+                if proxy is not None:
+                    proxy_pool.on_success(proxy)
                 if 'data' in resp.text and resp.json():
                     return resp
                 else:
                     logger.error(f'Request not include data | Response: {resp.text}')
                     retry_count += 1
             elif (resp.status_code == 429):
-                wait_time = base_delay * (2 ** retry_count) * 2
-                logger.error(f"Too many requests. Waiting for {wait_time:.1f} seconds before retrying.")
-                sleep(wait_time)
+                limiter.on_throttled()
+                metrics.inc('throttled', path)
+                if proxy is not None:
+                    proxy_pool.on_throttled(proxy)
+                logger.error(f"Too many requests. {path} 的速率已降至 {limiter.rate:.2f} 次/秒")
                 retry_count += 1
             else:
                 logger.error(f'Bad request status code: {resp.status_code} | Method: {method} | Response: {resp.text}')
                 retry_count += 1
+                if proxy is not None:
+                    proxy_pool.on_error(proxy)
+                # 使用指数退避策略计算重试前的等待时间
+                sleep(base_delay * (2 ** (retry_count - 1)) + random.uniform(0, 0.5))
 
         except Exception as error:
-            logger.error(f'Unexpected error while sending request to {url}: {error}')
             retry_count += 1
-            # 对于超时错误，增加更长的等待时间
-            if "timeout" in str(error).lower() or "deadline exceeded" in str(error).lower():
-                wait_time = base_delay * (2 ** retry_count) * 3
-                logger.error(f"Request timeout. Waiting for {wait_time:.1f} seconds before retrying.")
-                sleep(wait_time)
+            if proxy is not None and '429' in str(error):
+                # 代理自身限流时 tls_client 抛出异常（CONNECT 返回 429），与接口返回 429 同样处理
+                limiter.on_throttled()
+                metrics.inc('throttled', path)
+                proxy_pool.on_throttled(proxy)
+                logger.error(f"Too many requests. 代理 {proxy.name} 上 {path} 的速率已降至 {limiter.rate:.2f} 次/秒")
+            else:
+                logger.error(f'Unexpected error while sending request to {url}: {error}')
+                if proxy is not None:
+                    proxy_pool.on_error(proxy)
+                    proxy_pool.rotate(session)
+                # 对于超时错误，增加更长的等待时间
+                if "timeout" in str(error).lower() or "deadline exceeded" in str(error).lower():
+                    wait_time = base_delay * (2 ** retry_count) * 3
+                    logger.error(f"Request timeout. Waiting for {wait_time:.1f} seconds before retrying.")
+                    sleep(wait_time)
+                else:
+                    sleep(base_delay * (2 ** (retry_count - 1)) + random.uniform(0, 0.5))
 
         # 重新生成请求头
         if retry_count < max_retries:  # 只在还要继续重试时才重新生成
+            metrics.inc('retries', path)
             if (method == 'GET'):
-                edit_session_headers(node_process, session, params, method, url.split('api.debank.com')[1].split('?')[0])
+                edit_session_headers(signer, session, params, method, path)
             else:
-                edit_session_headers(node_process, session, payload, method, url)
+                edit_session_headers(signer, session, payload, method, url)
 
+    metrics.inc('failures', path)
     logger.error(f"达到最大重试次数 ({max_retries})，跳过请求: {url}")
     return None  # 返回None表示所有重试都失败了
+
+def prefetch_signature(path, params):
+    """登记即将发送的 GET 请求，让签名服务提前签名；命中缓存或可以复用内存中响应的请求不需要签名"""
+    signer = get_signer()
+    if not hasattr(signer, 'schedule'):
+        return
+    if request_memo.has(ResponseCache.make_key(path, params)):
+        return
+    cache = get_cache()
+    if cache is not None and cache.has(path, params):
+        return
+    signer.schedule(params, 'GET', path)
+
+def fetch_json(signer, session, path, params):
+    cache = get_cache()
+    if cache is not None:
+        data = cache.get(path, params)
+        if data is not None:
+            metrics.inc('cache_hits', path)
+            return data
+
+    edit_session_headers(signer, session, params, 'GET', path)
+    resp = send_request(
+        signer,
+        session=session,
+        method='GET',
+        url=f'{DEBANK_API_URL}{path}?{urlencode(params)}',
+        params=params,
+    )
+    if resp is None:
+        raise RuntimeError(f'请求 {path} 失败')
+
+    data = resp.json()
+    if cache is not None:
+        cache.set(path, params, data)
+    return data
+
+def request_json(signer, session, path, params):
+    """带缓存的 DeBank GET 请求，返回解析后的 JSON（多个调用方共享，不要修改）：
+    相同的请求正在进行或刚刚完成时直接共享其响应，命中缓存时不签名也不发送请求"""
+    data, coalesced = request_memo.get_or_fetch(
+        ResponseCache.make_key(path, params), lambda: fetch_json(signer, session, path, params)
+    )
+    if coalesced:
+        metrics.inc('coalesced', path)
+    return data
         
 def setup_session():
     session = requests.Session()
@@ -96,32 +200,13 @@ def setup_session():
     # 设置请求超时（连接超时和读取超时）
     session.timeout_seconds = 30
 
-    headers = {
-        'authority': 'api.debank.com',
-        'accept': '*/*',
-        'accept-language': 'ru-RU,ru;q=0.9',
-        'cache-control': 'no-cache',
-        'origin': 'https://debank.com',
-        'pragma': 'no-cache',
-        'referer': 'https://debank.com/',
-        'sec-ch-ua': '"Chromium";v="112", "Google Chrome";v="112", "Not:A-Brand";v="99"',
-        'sec-ch-ua-mobile': '?0',
-        'sec-ch-ua-platform': '"Linux"',
-        'sec-fetch-dest': 'empty',
-        'sec-fetch-mode': 'cors',
-        'sec-fetch-site': 'same-site',
-        'source': 'web',
-        'user-agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36',
-        'x-api-nonce': 'n_RT2KhwQF08JA3CwiTUOhUnel9ELZPGHDb2UgZLKh',
-        'x-api-sign': 'fb69dcdb900a27540c6fd9e13a08db75d16a2b917cfc33991e834552691a1a72',
-        'x-api-ts': '1690894427',
-        'x-api-ver': 'v2',
-    }
-    session.headers = headers
+    session.headers = dict(DEBANK_HEADERS)
+
+    # 配置了代理时，每个会话分配到当前会话最少的健康代理上
+    proxy_pool = get_proxy_pool()
+    if proxy_pool is not None:
+        proxy_pool.assign(session)
 
-    # 确保可以从任何路径运行时都能正确引用 js/main.js
-    import os
-    js_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'js', 'main.js')
-    node_process = subprocess.Popen(['node', js_path], stdin=subprocess.PIPE, stdout=subprocess.PIPE, universal_newlines=True)
-    return session, node_process
+    # 所有会话共享同一个常驻签名服务，不再为每个线程单独启动 node 进程
+    return session, get_signer()
 
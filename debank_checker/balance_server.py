@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import argparse
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import time
+from urllib.parse import urlparse, parse_qs
+
+from termcolor import colored
+
+# 确保可以从任何路径运行时都能正确引用本地 app 目录下的模块
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app.config import *
+from app.json import load_entries
+from app.utils import setup_session, request_json
+from app.cache import get_cache, close_cache, ResponseCache
+from app.coalesce import request_memo
+from app.proxy import get_proxy_pool
+from app.signer import close_signer
+
+
+class ResultIndex:
+    """把一个或多个查询结果文件（例如各分片的输出）加载为 {钱包: 结果}，
+    文件被新一次查询覆盖后，下一次请求时自动重新加载"""
+
+    def __init__(self, paths):
+        self.paths = paths
+        self._mtimes = {}
+        self._entries = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def _refresh(self):
+        mtimes = {path: os.path.getmtime(path) for path in self.paths if os.path.exists(path)}
+        if mtimes == self._mtimes:
+            return
+        entries = {}
+        for path in self.paths:
+            for entry in load_entries(path):
+                entries[entry['wallet']] = entry
+        self._entries = entries
+        self._mtimes = mtimes
+        self._loaded_at = time()
+        logger.info(f'📂  已加载 {len(entries)} 个钱包的查询结果')
+
+    def get(self, wallet):
+        with self._lock:
+            self._refresh()
+            return self._entries.get(wallet)
+
+    def stats(self):
+        with self._lock:
+            self._refresh()
+            return {
+                'wallets': len(self._entries),
+                'sources': list(self._mtimes),
+                'loaded_at': self._loaded_at,
+            }
+
+
+TOTAL_PATH = '/asset/net_curve_24h'
+
+
+def cached_total(wallet):
+    """从请求合并层或 cache.db 中读取钱包的总余额，没有有效缓存时返回 None，不发送请求"""
+    params = {'user_addr': wallet}
+    data = request_memo.get(ResponseCache.make_key(TOTAL_PATH, params))
+    if data is None:
+        cache = get_cache()
+        data = cache.get(TOTAL_PATH, params) if cache is not None else None
+    if data is None:
+        return None
+    return data['data']['usd_value_list'][-1][1]
+
+
+class LiveFetcher:
+    """缓存未命中时向 DeBank 查询总余额（需要 --live）：所有请求共用一个会话，按顺序发送，
+    服务停止时释放会话占用的代理"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._session = None
+        self._signer = None
+
+    def total(self, wallet):
+        with self._lock:
+            if self._session is None:
+                self._session, self._signer = setup_session()
+            data = request_json(self._signer, self._session, TOTAL_PATH, {'user_addr': wallet})
+        return data['data']['usd_value_list'][-1][1]
+
+    def close(self):
+        with self._lock:
+            if self._session is None:
+                return
+            proxy_pool = get_proxy_pool()
+            if proxy_pool is not None:
+                proxy_pool.release(self._session)
+            # tls_client 0.2.1 的 Session 没有 close()，新版本才有
+            close_session = getattr(self._session, 'close', None)
+            if close_session is not None:
+                close_session()
+            self._session = None
+
+
+def make_handler(index, live=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            started = time()
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            parts = [part for part in url.path.split('/') if part]
+            try:
+                if parts == ['health']:
+                    self._send(200, index.stats())
+                elif parts == ['wallets']:
+                    # 批量查询：/wallets?address=0x...&address=0x...
+                    wallets = [wallet.lower() for wallet in query.get('address', [])]
+                    found = [index.get(wallet) for wallet in wallets]
+                    self._send(200, [entry for entry in found if entry is not None])
+                elif len(parts) == 2 and parts[0] == 'wallets':
+                    entry = index.get(parts[1].lower())
+                    if entry is None:
+                        self._send(404, {'error': '没有该钱包的查询结果'})
+                    elif 'chain' in query and isinstance(entry.get('chains'), dict):
+                        chains = {chain: entry['chains'].get(chain) for chain in query['chain']}
+                        self._send(200, dict(entry, chains=chains))
+                    else:
+                        self._send(200, entry)
+                elif len(parts) == 3 and parts[0] == 'wallets' and parts[2] == 'total':
+                    wallet = parts[1].lower()
+                    total = cached_total(wallet)
+                    if total is None and live is not None:
+                        total = live.total(wallet)
+                    if total is None:
+                        self._send(404, {'error': '缓存中没有该钱包的总余额（启动时加上 --live 可实时查询）'})
+                    else:
+                        self._send(200, {'wallet': wallet, 'total_all_chains': total})
+                else:
+                    self._send(404, {'error': '未知的接口'})
+            except Exception as e:
+                logger.error(f'处理 {self.path} 时出错: {e}')
+                self._send(502, {'error': str(e)})
+            logger.debug(f'{self.path} {(time() - started) * 1000:.1f}ms')
+
+        def _send(self, status, data):
+            body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='本地 HTTP 服务：从查询结果和响应缓存中返回钱包余额')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8780)
+    parser.add_argument(
+        '--input', action='append', default=None,
+        help='查询结果文件，可重复指定以合并多个分片的结果，默认 balances.json'
+    )
+    parser.add_argument(
+        '--live', action='store_true',
+        help='/wallets/<地址>/total 在缓存未命中时实时向 DeBank 查询，默认只从缓存中返回'
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    index = ResultIndex(args.input or [file_ndjson if OUTPUT_FORMAT == 'ndjson' else file_json])
+    index.stats()
+    live = LiveFetcher() if args.live else None
+    httpd = ThreadingHTTPServer((args.host, args.port), make_handler(index, live))
+    httpd.daemon_threads = True
+    print(colored(f"🌐  余额服务已启动: http://{args.host}:{httpd.server_address[1]}", "green", attrs=["bold"]))
+    print(colored("   GET /health | /wallets/<地址>[?chain=eth] | /wallets?address=<地址>&address=... | /wallets/<地址>/total", "light_blue"))
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(colored("\n👋 已停止", "yellow"))
+    finally:
+        httpd.server_close()
+        if live is not None:
+            live.close()
+        close_signer()
+        close_cache()
@@ -0,0 +1,152 @@
+import io
+import os
+import sys
+import argparse
+import tempfile
+import contextlib
+
+from time import monotonic
+
+from tabulate import tabulate
+from termcolor import colored
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_debank import MockDebankServer
+from mock_proxy import MockProxy
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='使用本地模拟接口对 get_balances 进行端到端压测')
+    parser.add_argument('--wallets', type=int, default=50, help='压测使用的钱包数量')
+    parser.add_argument('--threads', default='1,4,8,16', help='要对比的线程数（异步模式下为同时进行的任务数），逗号分隔')
+    parser.add_argument('--backend', choices=('thread', 'async'), default='thread', help='请求方式（CLIENT_BACKEND）')
+    parser.add_argument('--connections', type=int, default=None, help='异步模式下的最大连接数（ASYNC_MAX_CONNECTIONS）')
+    parser.add_argument('--rate', type=float, default=None, help='所有接口共享的请求速率上限（MAX_REQUESTS_PER_SECOND）')
+    parser.add_argument('--rate-initial', type=float, default=None, help='每个接口的初始速率（RATE_INITIAL）')
+    parser.add_argument('--rate-max', type=float, default=None, help='每个接口的最大速率（RATE_MAX）')
+    parser.add_argument('--sleep-time', type=float, default=None, help='非 429 失败后的重试等待时间（SLEEP_TIME）')
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟接口的平均响应延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.02, help='模拟接口延迟的标准差（秒）')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='模拟接口返回 429 的概率（0-1）')
+    parser.add_argument('--chains', type=int, default=3, help='每个钱包使用的链数量')
+    parser.add_argument('--tokens', type=int, default=5, help='每条链返回的代币数量')
+    parser.add_argument('--pools', type=int, default=1, help='每个钱包的池子数量')
+    parser.add_argument('--empty-ratio', type=float, default=0.0, help='空钱包的比例（0-1）')
+    parser.add_argument('--proxies', type=int, default=0, help='启动的本地代理数量，0 表示直接连接')
+    parser.add_argument('--proxy-limit', type=int, default=None, help='每个本地代理每秒允许的请求数，超出时返回 429')
+    parser.add_argument('--proxy-rate', type=float, default=None, help='客户端每个代理的请求预算（PROXY_MAX_REQUESTS_PER_SECOND）')
+    return parser.parse_args()
+
+
+def make_wallets(count):
+    return [f'0x{i:040x}' for i in range(1, count + 1)]
+
+
+def main():
+    args = parse_args()
+    server = MockDebankServer(
+        latency=args.latency, jitter=args.jitter, rate_429=args.rate_429,
+        chains_per_wallet=args.chains, tokens_per_chain=args.tokens, pools_per_wallet=args.pools,
+        empty_ratio=args.empty_ratio,
+    ).start()
+
+    # 必须在导入 app 之前设置，config.py 在导入时读取 DEBANK_API_URL
+    os.environ['DEBANK_API_URL'] = server.url
+
+    import app.cache
+    import app.proxy
+    import app.ratelimit
+    from app.metrics import metrics
+    import app.utils
+    from app.coalesce import request_memo
+    import main as checker
+
+    # 压测时不能命中缓存，否则第二轮以后不会发出任何请求
+    app.cache.CACHE_ENABLED = False
+    if args.rate is not None:
+        app.ratelimit.request_budget.rate = args.rate
+    if args.rate_initial is not None:
+        app.ratelimit.RATE_INITIAL = args.rate_initial
+    if args.rate_max is not None:
+        app.ratelimit.RATE_MAX = args.rate_max
+    if args.sleep_time is not None:
+        app.utils.SLEEP_TIME = args.sleep_time
+
+    if args.connections is not None:
+        checker.ASYNC_MAX_CONNECTIONS = args.connections
+    if args.proxy_rate is not None:
+        app.proxy.PROXY_MAX_REQUESTS_PER_SECOND = args.proxy_rate
+
+    proxies = [MockProxy(limit=args.proxy_limit).start() for _ in range(args.proxies)]
+    wallets = make_wallets(args.wallets)
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        # 不读取用户自己的 proxies.txt；--proxies 为 0 时文件为空，直接连接
+        app.proxy.file_proxies = os.path.join(tmp, 'proxies.txt')
+        with open(app.proxy.file_proxies, 'w', encoding='utf-8') as f:
+            f.write(''.join(f'{proxy.url}\n' for proxy in proxies))
+
+        for num_of_threads in [int(n) for n in args.threads.split(',')]:
+            print(colored(f"🚀  {args.backend} 并发数 {num_of_threads}：正在查询 {len(wallets)} 个钱包...", "cyan", attrs=["bold"]))
+            server.reset_stats()
+            for proxy in proxies:
+                proxy.reset_stats()
+            app.ratelimit.reset_limiters()
+            # 上一轮的响应仍在内存中，不清空的话本轮的大部分请求会直接复用，各轮的吞吐量无法比较
+            request_memo.clear()
+
+            if args.backend == 'async':
+                pool = checker.AsyncWorkerPool(num_of_threads)
+            else:
+                pool = checker.WorkerPool(num_of_threads)
+            started = monotonic()
+            with contextlib.redirect_stdout(io.StringIO()):
+                checker.get_balances(
+                    pool, wallets, output_mode='1', min_amount=0.01,
+                    output_file=os.path.join(tmp, f'balances_{num_of_threads}.json'),
+                )
+            elapsed = monotonic() - started
+            rates = app.ratelimit.current_rates()
+            pool.shutdown()
+
+            # 延迟和重试取客户端统计（包含网络开销），请求数与模拟接口的服务端统计互相核对
+            stats = server.stats()
+            requests = sum(metrics.counter('requests').values())
+            http = metrics.histogram('http_seconds', by=None)
+            sign = metrics.histogram('sign_seconds', by=None)
+            wait = metrics.histogram('ratelimit_wait_seconds', by=None)
+            if requests != sum(stats['requests'].values()):
+                print(colored(f"⚠️  客户端请求数 {requests} 与服务端 {sum(stats['requests'].values())} 不一致", "yellow"))
+            rows.append([
+                args.backend,
+                num_of_threads,
+                len(proxies),
+                requests,
+                f'{elapsed:.2f}',
+                f'{requests / elapsed:.2f}',
+                f"{http['p50'] * 1000:.0f}",
+                f"{http['p95'] * 1000:.0f}",
+                f"{sign['p95'] * 1000:.0f}",
+                f"{wait['sum']:.1f}",
+                sum(metrics.counter('throttled').values()),
+                sum(metrics.counter('retries').values()),
+                ', '.join(f'{path}={rate}' for path, rate in sorted(rates.items())),
+            ])
+
+    for proxy in proxies:
+        proxy.stop()
+    server.stop()
+    print()
+    print(tabulate(
+        rows,
+        headers=[
+            '方式', '并发数', '代理数', '请求数', '耗时(s)', '请求/秒', 'p50(ms)', 'p95(ms)', '签名 p95(ms)', '限速等待(s)',
+            '429 次数', '重试次数', '结束时各接口速率',
+        ],
+        tablefmt='rounded_outline',
+    ))
+
+
+if __name__ == '__main__':
+    main()
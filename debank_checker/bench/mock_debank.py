@@ -0,0 +1,221 @@
+import os
+import sys
+import json
+import random
+import hashlib
+import argparse
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep, monotonic
+from urllib.parse import urlparse, parse_qsl
+
+from termcolor import colored
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from app.metrics import percentile
+
+
+CHAINS = ['eth', 'bsc', 'arb', 'op', 'matic', 'base', 'avax', 'ftm', 'linea', 'era', 'scrl', 'blast']
+# 每条链的第一个代币是原生币，用于测试只在部分链上存在的代币（例如 BNB 只在 bsc 上）
+NATIVE_SYMBOLS = {'bsc': 'BNB', 'matic': 'MATIC', 'avax': 'AVAX', 'ftm': 'FTM'}
+
+
+class MockDebankServer:
+    """本地模拟的 DeBank 接口，支持可配置的延迟、429 注入和返回数据大小，用于调参和压测"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.05, jitter=0.02, rate_429=0.0,
+                 chains_per_wallet=3, tokens_per_chain=5, pools_per_wallet=1, empty_ratio=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.chains_per_wallet = chains_per_wallet
+        self.tokens_per_chain = tokens_per_chain
+        self.pools_per_wallet = pools_per_wallet
+        self.empty_ratio = empty_ratio
+
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-debank', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self._requests = {}
+            self._throttled = {}
+            self._seen = set()
+            self._duplicates = 0
+            self._latencies = []
+
+    def stats(self):
+        """按接口统计的请求数、429 次数、服务端响应耗时，以及同一请求被重复发送的次数（即客户端重试次数）"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return {
+                'requests': dict(self._requests),
+                'throttled': dict(self._throttled),
+                'retries': self._duplicates,
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+            }
+
+    def _handle(self, handler):
+        started = monotonic()
+        parsed = urlparse(handler.path)
+        path = parsed.path
+        params = dict(parse_qsl(parsed.query))
+
+        with self._lock:
+            self._requests[path] = self._requests.get(path, 0) + 1
+            key = (path, parsed.query)
+            if key in self._seen:
+                self._duplicates += 1
+            self._seen.add(key)
+
+        delay = max(0.0, random.gauss(self.latency, self.jitter)) if self.jitter else self.latency
+        sleep(max(0.0, delay - (monotonic() - started)))
+
+        if random.random() < self.rate_429:
+            with self._lock:
+                self._throttled[path] = self._throttled.get(path, 0) + 1
+            status, body = 429, {'error_code': 429, 'error_msg': 'Too Many Requests'}
+        else:
+            data = self._response(path, params)
+            if data is None:
+                status, body = 404, {'error_msg': f'unknown path {path}'}
+            else:
+                status, body = 200, {'_cache_seconds': 0, 'data': data, 'error_code': 0}
+
+        with self._lock:
+            self._latencies.append(monotonic() - started)
+        self._send(handler, status, body)
+
+    @staticmethod
+    def _send(handler, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    def _rng(self, *parts):
+        # 同一个地址每次返回相同的数据，保证多次压测的结果可比较
+        seed = hashlib.sha256('|'.join(parts).encode('utf-8')).hexdigest()
+        return random.Random(seed)
+
+    def _is_empty(self, address):
+        return self._rng(address, 'empty').random() < self.empty_ratio
+
+    def _wallet_chains(self, address):
+        if self._is_empty(address):
+            return []
+        count = min(self.chains_per_wallet, len(CHAINS))
+        return self._rng(address, 'chains').sample(CHAINS, count)
+
+    def _tokens(self, address, chain):
+        rng = self._rng(address, chain)
+        tokens = []
+        for i in range(self.tokens_per_chain):
+            symbol = NATIVE_SYMBOLS.get(chain, 'ETH') if i == 0 else f'TKN{i}'
+            tokens.append({
+                'id': f'0x{hashlib.sha1(f"{chain}{symbol}".encode()).hexdigest()[:40]}',
+                'chain': chain,
+                'name': f'Mock Token {i}',
+                'symbol': symbol,
+                'optimized_symbol': symbol,
+                'decimals': 18,
+                'logo_url': f'https://static.debank.com/image/token/logo_url/{chain}/{symbol.lower()}.png',
+                # 同一个代币对所有钱包的价格相同，与真实接口一致
+                'price': round(self._rng(chain, symbol).uniform(0.01, 2000), 4),
+                'amount': round(rng.uniform(0.001, 100), 6),
+                'raw_amount': 0,
+            })
+        return tokens
+
+    def _response(self, path, params):
+        address = (params.get('user_addr') or params.get('id') or '').lower()
+
+        if path == '/user/used_chains':
+            return {'chains': self._wallet_chains(address)}
+
+        if path == '/token/balance_list':
+            chain = params.get('chain', '')
+            return self._tokens(address, chain) if chain in self._wallet_chains(address) else []
+
+        if path == '/token/cache_balance_list':
+            return [token for chain in self._wallet_chains(address) for token in self._tokens(address, chain)]
+
+        if path == '/portfolio/project_list':
+            chains = self._wallet_chains(address)
+            pools = []
+            for i in range(min(self.pools_per_wallet, len(chains))):
+                pools.append({
+                    'name': f'Mock Protocol {i}',
+                    'chain': chains[i],
+                    'portfolio_item_list': [{'asset_token_list': self._tokens(address, chains[i])[:2]}],
+                })
+            return pools
+
+        if path == '/asset/net_curve_24h':
+            total = 0.0
+            for chain in self._wallet_chains(address):
+                total += sum(token['amount'] * token['price'] for token in self._tokens(address, chain))
+            return {'usd_value_list': [[0, round(total, 2)], [1, round(total, 2)]]}
+
+        return None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='本地模拟 DeBank 接口')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8910)
+    parser.add_argument('--latency', type=float, default=0.05, help='平均响应延迟（秒）')
+    parser.add_argument('--jitter', type=float, default=0.02, help='延迟的标准差（秒）')
+    parser.add_argument('--rate-429', type=float, default=0.0, help='返回 429 的概率（0-1）')
+    parser.add_argument('--chains', type=int, default=3, help='每个钱包使用的链数量')
+    parser.add_argument('--tokens', type=int, default=5, help='每条链返回的代币数量')
+    parser.add_argument('--pools', type=int, default=1, help='每个钱包的池子数量')
+    parser.add_argument('--empty-ratio', type=float, default=0.0, help='空钱包的比例（0-1）')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    server = MockDebankServer(
+        host=args.host, port=args.port, latency=args.latency, jitter=args.jitter, rate_429=args.rate_429,
+        chains_per_wallet=args.chains, tokens_per_chain=args.tokens, pools_per_wallet=args.pools,
+        empty_ratio=args.empty_ratio,
+    ).start()
+    print(colored(f"🛰️  模拟 DeBank 接口已启动: {server.url}", "green", attrs=["bold"]))
+    print(colored(f"💡  使用方法: DEBANK_API_URL={server.url} poetry run python main.py", "blue"))
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+        print(colored("\n👋 已停止", "yellow"))
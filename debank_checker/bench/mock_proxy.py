@@ -0,0 +1,174 @@
+import socket
+import argparse
+import threading
+import http.client
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic
+from urllib.parse import urlparse
+
+from termcolor import colored
+
+# 转发时不应原样传递的逐跳请求头
+HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'proxy-authorization', 'te', 'trailers', 'upgrade'}
+
+
+class MockProxy:
+    """本地 HTTP 转发代理，模拟一个出口 IP：超过每秒请求上限时直接返回 429（类似 Cloudflare 按 IP 限流）"""
+
+    def __init__(self, host='127.0.0.1', port=0, limit=None):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._window = (0, 0)
+        self.reset_stats()
+
+        proxy = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                proxy._forward(self)
+
+            def do_POST(self):
+                proxy._forward(self)
+
+            def do_CONNECT(self):
+                proxy._tunnel(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-proxy', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.requests = 0
+            self.throttled = 0
+
+    def _allow(self):
+        # 按整秒计数的固定窗口限流
+        with self._lock:
+            self.requests += 1
+            second = int(monotonic())
+            window, count = self._window
+            count = count + 1 if window == second else 1
+            self._window = (second, count)
+            if self.limit is not None and count > self.limit:
+                self.throttled += 1
+                return False
+            return True
+
+    def _forward(self, handler):
+        if not self._allow():
+            body = b'{"error_code":429,"error_msg":"Too Many Requests"}'
+            handler.send_response(429)
+            handler.send_header('Content-Type', 'application/json')
+            handler.send_header('Content-Length', str(len(body)))
+            handler.end_headers()
+            handler.wfile.write(body)
+            return
+
+        target = urlparse(handler.path)
+        length = int(handler.headers.get('Content-Length') or 0)
+        body = handler.rfile.read(length) if length else None
+        headers = {key: value for key, value in handler.headers.items() if key.lower() not in HOP_HEADERS}
+
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=30)
+        try:
+            path = target.path + (f'?{target.query}' if target.query else '')
+            conn.request(handler.command, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            data = resp.read()
+        finally:
+            conn.close()
+
+        handler.send_response(resp.status)
+        for key, value in resp.getheaders():
+            if key.lower() not in HOP_HEADERS and key.lower() not in ('content-length', 'transfer-encoding'):
+                handler.send_header(key, value)
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _tunnel(self, handler):
+        # HTTPS 目标通过 CONNECT 建立隧道，隧道内的请求无法单独限流，只按建立隧道计数
+        if not self._allow():
+            handler.send_response(429)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        host, _, port = handler.path.partition(':')
+        try:
+            upstream = socket.create_connection((host, int(port or 443)), timeout=30)
+        except OSError:
+            handler.send_response(502)
+            handler.send_header('Content-Length', '0')
+            handler.end_headers()
+            return
+
+        handler.send_response(200, 'Connection Established')
+        handler.end_headers()
+        client = handler.connection
+
+        def pipe(source, destination):
+            try:
+                while True:
+                    data = source.recv(65536)
+                    if not data:
+                        break
+                    destination.sendall(data)
+            except OSError:
+                pass
+            finally:
+                try:
+                    destination.shutdown(socket.SHUT_WR)
+                except OSError:
+                    pass
+
+        upstream_thread = threading.Thread(target=pipe, args=(upstream, client), daemon=True)
+        upstream_thread.start()
+        pipe(client, upstream)
+        upstream_thread.join()
+        upstream.close()
+        handler.close_connection = True
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='本地 HTTP 转发代理，用于测试代理池')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8920, help='第一个代理的端口，其余代理依次递增')
+    parser.add_argument('--count', type=int, default=3, help='启动的代理数量')
+    parser.add_argument('--limit', type=int, default=None, help='每个代理每秒允许的请求数，超出时返回 429')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    proxies = [MockProxy(args.host, args.port + i, args.limit).start() for i in range(args.count)]
+    print(colored(f"🛡️  已启动 {len(proxies)} 个本地代理，可写入 proxies.txt：", "green", attrs=["bold"]))
+    for proxy in proxies:
+        print(proxy.url)
+    try:
+        proxies[0]._thread.join()
+    except KeyboardInterrupt:
+        for proxy in proxies:
+            proxy.stop()
+        print(colored("\n👋 已停止", "yellow"))
@@ -117,23 +117,24 @@ function I(A) {
         }
 function s(A, e, a, c, M) {
             E();
-            var d = T(64)
-              , y = [f(A.toUpperCase()), f(e), f((I)(a)), f(c), f(M + "")]
+            // 分配时立即取出地址：后面的分配可能扩容 wasm 内存，之前创建的视图会失效，byteOffset 变成 0
+            var d = T(64).byteOffset
+              , y = [f(A.toUpperCase()).byteOffset, f(e).byteOffset, f((I)(a)).byteOffset, f(c).byteOffset, f(M + "").byteOffset]
 
-              , Q = U.mk_s_f(y[0].byteOffset, y[1].byteOffset, y[2].byteOffset, y[3].byteOffset, y[4].byteOffset, d.byteOffset);
+              , Q = U.mk_s_f(y[0], y[1], y[2], y[3], y[4], d);
               
             return y.forEach((function(A) {
                 //console.log("a")
-                return U.free(A.byteOffset)
+                return U.free(A)
             }
             )),
-            b(d.byteOffset, Q)
+            b(d, Q)
         }
 function r(A, e, a) {
             var c = arguments.length > 3 && void 0 !== arguments[3] ? arguments[3] : {};
             E();
-            var M = D()
-              , sukaay = Math.floor(Date.now() / 1e3)
+            var M = c.nonce || D()
+              , sukaay = c.ts || Math.floor(Date.now() / 1e3)
               , d = "v2"
               , b = s(e, a, A, M, sukaay);
             return {
@@ -143,17 +144,26 @@ function r(A, e, a) {
                 version: d
             }
         }
-    process.stdin.setEncoding('utf8');
-    process.stdin.on('data', (data) => {
-        const input = data.trim();
-
-        let payload = JSON.parse(input.split('|')[0])
-        let method = input.split('|')[1]
-        let url_path = input.split('|')[2]
-        U.set_sign_type(100120)
-        signature = r(payload, method, url_path)
+    // 每行一个 JSON 请求：{"id", "payload", "method", "path"}，响应带回相同的 id，
+    // 这样 Python 端可以并发提交多个签名请求，不必依赖固定的等待时间。
+    // 可选的 "nonce"、"ts" 字段用于固定签名输入（签名一致性校验）
+    const rl = require('readline').createInterface({ input: process.stdin });
+    rl.on('line', (line) => {
+        const input = line.trim();
+        if (!input) {
+            return;
+        }
 
-        process.stdout.write(JSON.stringify(signature) + '\n');
+        let request = {};
+        try {
+            request = JSON.parse(input);
+            U.set_sign_type(100120)
+            let signature = r(request.payload, request.method, request.path, { nonce: request.nonce, ts: request.ts })
+            signature.id = request.id
+            process.stdout.write(JSON.stringify(signature) + '\n');
+        } catch (error) {
+            process.stdout.write(JSON.stringify({ id: request.id, error: String(error) }) + '\n');
+        }
     });
 }
 
@@ -1,5 +1,10 @@
+import zlib
+import atexit
+import asyncio
+import argparse
 import threading
 
+from datetime import datetime
 from queue import Queue
 from time import time
 
@@ -9,9 +14,19 @@ from app.json import *
 from app.questions import *
 from app.config import *
 from app.utils import *
+from app.ratelimit import current_rates
+from app.journal import CheckpointJournal
+from app.signer import close_signer
+from app.cache import close_cache, get_cache
+from app.proxy import get_proxy_pool, close_proxy_pool
+from app.metrics import metrics
+from app.tokens import token_table
+from app.render import render_summary
+from app.aio import AsyncDebankClient, AsyncSession
+from app.snapshot import SnapshotWriter
 
 from app.config import file_json
-from app.json import save_full_to_json, save_selected_to_json
+from app.json import save_full_to_json, save_selected_to_json, load_previous_balances, BalanceStreamWriter
 
 from termcolor import colored
 import os
@@ -91,40 +106,53 @@ def choose_output_mode():
             return mode
         print(colored("❌  输入有误，请输入 1 或 2", "red", attrs=["bold"]))
 
-def chain_balance(node_process, session, address, chain, ticker, min_amount):
+def filter_coins(token_list, chain, ticker, min_amount):
+    # 代币元数据统一放在代币表中，每个钱包只保存 (代币, 数量)
     coins = []
+    for coin in token_list:
+        if (ticker == None or coin['optimized_symbol'] == ticker):
+            coin_in_usd = '?' if (coin["price"] is None) else coin["amount"] * coin["price"]
+            if (type(coin_in_usd) is str or (type(coin_in_usd) is float and coin_in_usd > min_amount)):
+                coins.append(token_table.holding(chain, coin))
+    return coins
+
+
+def split_by_chain(token_list, ticker, min_amount):
+    # 全链代币列表按链拆分成 {链: 代币列表}
+    tokens_by_chain = {}
+    for coin in token_list:
+        tokens_by_chain.setdefault(coin.get('chain'), []).append(coin)
+
+    return {chain: filter_coins(tokens, chain, ticker, min_amount) for chain, tokens in tokens_by_chain.items()}
+
 
+def chain_balance(signer, session, address, chain, ticker, min_amount):
     payload = {
         'user_addr': address,
         'chain': chain
     }
     try:
-        edit_session_headers(node_process, session, payload, 'GET', '/token/balance_list')
-        resp = send_request(
-            node_process, 
-            session=session,
-            method='GET',
-            url=f'https://api.debank.com/token/balance_list?user_addr={address}&chain={chain}',
-        )
-        data = resp.json()
+        data = request_json(signer, session, '/token/balance_list', payload)
     except Exception as e:
         logger.error(f"获取 {address} 在 {chain} 的余额时出错: {e}")
-        return coins
+        # 返回 None 而不是空列表，与余额为零区分，失败的结果不写入断点日志
+        return None
 
-    for coin in data.get('data', []):
-        if (ticker == None or coin['optimized_symbol'] == ticker):
-            coin_in_usd = '?' if (coin["price"] is None) else coin["amount"] * coin["price"]
-            if (type(coin_in_usd) is str or (type(coin_in_usd) is float and coin_in_usd > min_amount)):
-                coins.append({
-                    'amount': coin['amount'],
-                    'name': coin['name'],
-                    'ticker': coin['optimized_symbol'],
-                    'price': coin['price'],
-                    'logo_url': coin['logo_url'],
-                    'contract_address': coin.get('id', '')
-                })
-    
-    return coins
+    return filter_coins(data.get('data', []), chain, ticker, min_amount)
+
+
+def all_chain_balance(signer, session, address, ticker, min_amount):
+    # 一次请求获取钱包在所有链上的代币，再按链拆分成 {链: 代币列表}
+    payload = {
+        'user_addr': address,
+    }
+    try:
+        data = request_json(signer, session, '/token/cache_balance_list', payload)
+    except Exception as e:
+        logger.error(f"获取 {address} 在所有链上的余额时出错: {e}")
+        return None
+
+    return split_by_chain(data.get('data', []), ticker, min_amount)
 
 
 def show_help():
@@ -135,10 +163,10 @@ def show_help():
     print()
     
     questions = [
-        ("❓ 最小代币金额（美元）是什么意思？", "如果某个代币的美元金额小于设定的最小值，则不会被写入 balances.json。"),
-        ("❓ 工作线程数是什么意思？", "这是同时获取钱包信息的'工作进程'数量。线程数越多，被 Cloudflare 限制的风险越高。推荐 3 个线程。"),
+        ("❓ 最小代币金额（美元）是什么意思？", "如果某个代币的美元金额小于设定的最小值，则不会被写入 balances.json。总余额不超过该值的钱包会跳过逐链查询（可在 app/config.py 中通过 PRUNE_EMPTY_WALLETS 关闭）。"),
+        ("❓ 工作线程数是什么意思？", "这是同时获取钱包信息的'工作进程'数量。所有线程共享 app/config.py 中 MAX_REQUESTS_PER_SECOND 的请求预算。推荐 3 个线程；在 proxies.txt 中配置代理后，每个代理有独立的预算，推荐线程数为代理数的 2~3 倍。"),
         ("❓ 余额进度条不动怎么办？", "减少线程数/检查网络连接。"),
-        ("❓ 为什么获取钱包已用链列表很慢？", "因为该请求容易被 Cloudflare 限制，所以只能单线程处理。"),
+        ("❓ 为什么获取钱包已用链列表很慢？", "因为该请求容易被 Cloudflare 限制，请求速度受 MAX_REQUESTS_PER_SECOND 限制。如果频繁被限制，请调低该值。"),
         ("❓ 其他问题？", "欢迎交流 🔗 https://t.me/cryptostar210")
     ]
     
@@ -150,19 +178,12 @@ def show_help():
     
     print_end_separator()
 
-def get_used_chains(node_process, session, address):
+def get_used_chains(signer, session, address):
     payload = {
         'id': address,
     }
     try:
-        edit_session_headers(node_process, session, payload, 'GET', '/user/used_chains')
-        resp = send_request(
-            node_process, 
-            session=session,
-            method='GET',
-            url=f'https://api.debank.com/user/used_chains?id={address}',
-        )
-        data = resp.json()
+        data = request_json(signer, session, '/user/used_chains', payload)
         chains = data['data']['chains']
     except Exception as e:
         logger.error(f"获取 {address} 已用链时出错: {e}")
@@ -170,278 +191,738 @@ def get_used_chains(node_process, session, address):
     return chains
 
 
-def get_chains(node_process, session, wallets):
+def get_chains(signer, session, wallets):
     chains = set()
 
     with alive_bar(len(wallets), title='⛓️ 链列表', bar='smooth') as bar:
         for wallet in wallets:
-            chains = chains.union(get_used_chains(node_process, session, wallet))
+            chains = chains.union(get_used_chains(signer, session, wallet))
             bar()
 
     print()
     return chains
 
 
-def get_wallet_balance(node_process, session, address):
+def get_wallet_balance(signer, session, address):
     payload = {
         'user_addr': address,
     }
     try:
-        edit_session_headers(node_process, session, payload, 'GET', '/asset/net_curve_24h')
-        resp = send_request(
-            node_process,
-            session=session,
-            method='GET',
-            url=f'https://api.debank.com/asset/net_curve_24h?user_addr={address}',
-        )
-        data = resp.json()
+        data = request_json(signer, session, '/asset/net_curve_24h', payload)
         usd_value = data['data']['usd_value_list'][-1][1]
     except Exception as e:
         logger.error(f"获取 {address} 总余额时出错: {e}")
-        usd_value = 0.0
+        usd_value = None
     return usd_value
 
 
-def get_pools(node_process, session, wallets):
-    def get_pool(session, address):
-        pools = {}
-        payload = {
-            'user_addr': address,
-        }
-        try:
-            edit_session_headers(node_process, session, payload, 'GET', '/portfolio/project_list')
-            resp = send_request(
-                node_process,
-                session=session,
-                method='GET',
-                url=f'https://api.debank.com/portfolio/project_list?user_addr={address}',
-            )
-            data = resp.json()
-        except Exception as e:
-            logger.error(f"获取 {address} 池子信息时出错: {e}")
-            return pools
-
-        for pool in data.get('data', []):
-            pools[f"{pool['name']} ({pool['chain']})"] = []
-            for item in pool.get('portfolio_item_list', []):
-                for coin in item.get('asset_token_list', []):
-                    pools[f"{pool['name']} ({pool['chain']})"].append({
-                        'amount': coin['amount'],
-                        'name': coin['name'],
-                        'ticker': coin['optimized_symbol'],
-                        'price': coin['price'],
-                        'logo_url': coin['logo_url'],
-                        'contract_address': coin.get('id', '')
-                    })
-
+def get_pool(signer, session, address):
+    pools = {}
+    payload = {
+        'user_addr': address,
+    }
+    try:
+        data = request_json(signer, session, '/portfolio/project_list', payload)
+    except Exception as e:
+        logger.error(f"获取 {address} 池子信息时出错: {e}")
         return pools
-    
-    all_pools = {}
 
-    with alive_bar(len(wallets), title='🏊 池子信息', bar='smooth') as bar:
-        for wallet in wallets:
-            pools = get_pool(session, wallet)
-            for pool in pools:
-                if (pool not in all_pools):
-                    all_pools[pool] = {}
-                all_pools[pool][wallet] = pools[pool]
-            bar()
+    return parse_pools(data)
 
-    for pool in all_pools:
-        for wallet in wallets:
-            if (wallet not in all_pools[pool]):
-                all_pools[pool][wallet] = []
+
+def parse_pools(data):
+    pools = {}
+    for pool in data.get('data', []):
+        pools[f"{pool['name']} ({pool['chain']})"] = []
+        for item in pool.get('portfolio_item_list', []):
+            for coin in item.get('asset_token_list', []):
+                pools[f"{pool['name']} ({pool['chain']})"].append(token_table.holding(pool['chain'], coin))
+
+    return pools
+
+
+def get_chains_and_pools(queue_tasks, queue_results, wallets, with_pools=True):
+    # 已用链列表和池子信息交给工作线程并发获取，请求速度由共享的请求预算控制；
+    # with_pools 为 False 时只获取链列表（流式输出时池子在余额阶段按钱包获取）
+    for wallet in wallets:
+        put_task(queue_tasks, ('get_used_chains', wallet))
+        if (with_pools):
+            put_task(queue_tasks, ('get_pool', wallet))
+
+    chains = set()
+    all_pools = {}
+    total_tasks = len(wallets) * (2 if with_pools else 1)
+    # 两类任务并发执行，分别记录各自最后一个结果返回的时间作为阶段耗时
+    started = time()
+    remaining = {'get_used_chains': len(wallets), 'get_pool': len(wallets)}
+    with alive_bar(total_tasks, title='⛓️ 链列表和池子', bar='smooth') as bar:
+        for _ in range(total_tasks):
+            result = queue_results.get()
+            remaining[result[0]] -= 1
+            if (remaining[result[0]] == 0):
+                metrics.add_phase('chains' if result[0] == 'get_used_chains' else 'pools', time() - started)
+            if (result[0] == 'get_used_chains'):
+                chains = chains.union(result[2])
+            else:
+                wallet, pools = result[1], result[2]
+                for pool in pools:
+                    if (pool not in all_pools):
+                        all_pools[pool] = {}
+                    all_pools[pool][wallet] = pools[pool]
+            bar()
+    # 不在某个池子中的钱包不占用条目，输出时按空列表处理
     print()
 
-    return all_pools
+    return chains, all_pools
+
+
+def task_request(task):
+    # 任务将要发送的 DeBank 请求 (接口, 参数)，用于提前生成签名
+    if (task[0] == 'chain_balance'):
+        return '/token/balance_list', {'user_addr': task[1], 'chain': task[2]}
+    elif (task[0] == 'all_chain_balance'):
+        return '/token/cache_balance_list', {'user_addr': task[1]}
+    elif (task[0] == 'get_wallet_balance'):
+        return '/asset/net_curve_24h', {'user_addr': task[1]}
+    elif (task[0] == 'get_used_chains'):
+        return '/user/used_chains', {'id': task[1]}
+    elif (task[0] == 'get_pool'):
+        return '/portfolio/project_list', {'user_addr': task[1]}
+    return None
+
+
+def failed_result(task):
+    # 任务出错时返回与正常结果格式相同的空结果，保证每个任务都有一个结果，等待结果的一方不会一直阻塞
+    if (task[0] == 'chain_balance'):
+        return ('chain_balance', task[2], task[1], None)
+    elif (task[0] == 'all_chain_balance'):
+        return ('all_chain_balance', task[1], None)
+    elif (task[0] == 'get_wallet_balance'):
+        return ('get_wallet_balance', task[1], None)
+    elif (task[0] == 'get_used_chains'):
+        return ('get_used_chains', task[1], [])
+    elif (task[0] == 'get_pool'):
+        return ('get_pool', task[1], {})
+    return None
+
+
+def prefetch_task(task):
+    request = task_request(task)
+    if (request is not None):
+        prefetch_signature(*request)
+
+
+class TaskQueue(Queue):
+    """任务队列：队首的 SIGN_PREFETCH_DEPTH 个任务登记签名预取，每取走一个任务就登记窗口中新进入的任务。
+    预取始终跟随队列的进度，登记数量有上限，任务再多也不会漏掉预取"""
+
+    def __init__(self, depth=SIGN_PREFETCH_DEPTH):
+        super().__init__()
+        self.depth = depth
+        self._scheduled = 0  # 队首已登记预取的任务数
+        self._to_schedule = []
+
+    # _put 和 _get 在持有 self.mutex 时调用，只记录需要登记的任务，释放锁后再登记（需要查询缓存）
+    def _put(self, item):
+        super()._put(item)
+        self._advance()
+
+    def _get(self):
+        item = super()._get()
+        if (self._scheduled):
+            self._scheduled -= 1
+        self._advance()
+        return item
+
+    def _advance(self):
+        while (self._scheduled < min(self.depth, len(self.queue))):
+            self._to_schedule.append(self.queue[self._scheduled])
+            self._scheduled += 1
+
+    def _schedule_pending(self):
+        with self.mutex:
+            tasks, self._to_schedule = self._to_schedule, []
+        for task in tasks:
+            prefetch_task(task)
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        self._schedule_pending()
+
+    def get(self, block=True, timeout=None):
+        item = super().get(block, timeout)
+        self._schedule_pending()
+        return item
+
+
+def put_task(queue_tasks, task):
+    # 队列负责登记签名预取，工作线程取到任务时签名通常已经生成
+    queue_tasks.put(task)
 
 
 def worker(queue_tasks, queue_results):
-    session, node_process = setup_session()
+    session, signer = setup_session()
 
     while True:
         try:
             task = queue_tasks.get()
             if (task[0] == 'chain_balance'):
-                balance = chain_balance(node_process, session, task[1], task[2], task[3], task[4])
-                queue_results.put((task[2], task[1], balance))
+                balance = chain_balance(signer, session, task[1], task[2], task[3], task[4])
+                queue_results.put(('chain_balance', task[2], task[1], balance))
+            elif (task[0] == 'all_chain_balance'):
+                balances = all_chain_balance(signer, session, task[1], task[2], task[3])
+                queue_results.put(('all_chain_balance', task[1], balances))
             elif (task[0] == 'get_wallet_balance'):
-                balance = get_wallet_balance(node_process, session, task[1])
-                queue_results.put((task[1], balance))
+                balance = get_wallet_balance(signer, session, task[1])
+                queue_results.put(('get_wallet_balance', task[1], balance))
+            elif (task[0] == 'get_used_chains'):
+                chains = get_used_chains(signer, session, task[1])
+                queue_results.put(('get_used_chains', task[1], chains))
+            elif (task[0] == 'get_pool'):
+                pools = get_pool(signer, session, task[1])
+                queue_results.put(('get_pool', task[1], pools))
             elif (task[0] == 'done'):
                 queue_tasks.put(('done',))
                 break
         except Exception as e:
             logger.error(f"线程任务执行出错: {e}")
+            result = failed_result(task)
+            if (result is not None):
+                queue_results.put(result)
+
+    proxy_pool = get_proxy_pool()
+    if (proxy_pool is not None):
+        proxy_pool.release(session)
+    # tls_client 0.2.1 的 Session 没有 close()，新版本才有
+    close_session = getattr(session, 'close', None)
+    if (close_session is not None):
+        close_session()
+
+
+class WorkerPool:
+    """常驻工作线程池：会话、签名服务和线程在进程内只创建一次，各菜单操作之间复用，退出时统一关闭"""
+
+    def __init__(self, num_of_threads):
+        self.queue_tasks = TaskQueue()
+        self.queue_results = Queue()
+        self.threads = []
+        self._closed = False
+        for i in range(num_of_threads):
+            th = threading.Thread(
+                target=worker, args=(self.queue_tasks, self.queue_results), name=f'worker-{i + 1}', daemon=True
+            )
+            self.threads.append(th)
+            th.start()
+
+    def shutdown(self):
+        if (self._closed):
+            return
+        self._closed = True
+        self.queue_tasks.put(('done',))
+        for th in self.threads:
+            th.join(timeout=SIGNER_TIMEOUT)
+        close_signer()
+        close_cache()
+        close_proxy_pool()
+
+async def run_task_async(client, session, task):
+    # 与 worker 中的同名任务一一对应，返回相同的结果元组
+    path, params = task_request(task)
+    try:
+        data = await client.request_json(session, path, params)
+    except Exception as e:
+        logger.error(f"请求 {path} ({task[1]}) 时出错: {e}")
+        data = None
+
+    if (task[0] == 'chain_balance'):
+        coins = filter_coins(data.get('data', []), task[2], task[3], task[4]) if data is not None else None
+        return ('chain_balance', task[2], task[1], coins)
+    elif (task[0] == 'all_chain_balance'):
+        balances = split_by_chain(data.get('data', []), task[2], task[3]) if data is not None else None
+        return ('all_chain_balance', task[1], balances)
+    elif (task[0] == 'get_wallet_balance'):
+        try:
+            balance = data['data']['usd_value_list'][-1][1]
+        except Exception:
+            balance = None
+        return ('get_wallet_balance', task[1], balance)
+    elif (task[0] == 'get_used_chains'):
+        try:
+            chains = data['data']['chains']
+        except Exception:
+            chains = []
+        return ('get_used_chains', task[1], chains)
+    elif (task[0] == 'get_pool'):
+        return ('get_pool', task[1], parse_pools(data) if data is not None else {})
+
+
+class AsyncWorkerPool:
+    """异步工作池：与 WorkerPool 使用相同的任务和结果队列，但所有请求在一个事件循环线程中由协程并发发送，
+    同时进行的任务数不受线程数限制，实际请求速度仍由请求预算和限速器控制"""
+
+    def __init__(self, concurrency):
+        self.queue_tasks = TaskQueue()
+        self.queue_results = Queue()
+        self._closed = False
+        self._client = AsyncDebankClient(ASYNC_MAX_CONNECTIONS, ASYNC_HTTP2)
+        self._thread = threading.Thread(
+            target=asyncio.run, args=(self._run(concurrency),), name='async-worker', daemon=True
+        )
+        self._thread.start()
+
+    async def _run(self, concurrency):
+        # 有空闲的工作协程时才从任务队列取下一个任务，任务队列的签名预取窗口随实际进度前进
+        pending = asyncio.Queue(maxsize=1)
+        workers = [asyncio.create_task(self._worker(pending)) for _ in range(concurrency)]
+        loop = asyncio.get_running_loop()
+        while True:
+            # 只有这一个协程阻塞读取线程安全的任务队列，再分发给工作协程
+            task = await loop.run_in_executor(None, self.queue_tasks.get)
+            if (task[0] == 'done'):
+                break
+            await pending.put(task)
+        for _ in workers:
+            await pending.put(None)
+        await asyncio.gather(*workers)
+        await self._client.aclose()
+
+    async def _worker(self, pending):
+        session = AsyncSession()
+        proxy_pool = get_proxy_pool()
+        if (proxy_pool is not None):
+            proxy_pool.assign(session)
+
+        while True:
+            task = await pending.get()
+            if (task is None):
+                break
+            try:
+                self.queue_results.put(await run_task_async(self._client, session, task))
+            except Exception as e:
+                logger.error(f"协程任务执行出错: {e}")
+                result = failed_result(task)
+                if (result is not None):
+                    self.queue_results.put(result)
+
+        if (proxy_pool is not None):
+            proxy_pool.release(session)
+
+    def shutdown(self):
+        if (self._closed):
+            return
+        self._closed = True
+        self.queue_tasks.put(('done',))
+        self._thread.join(timeout=SIGNER_TIMEOUT)
+        close_signer()
+        close_cache()
+        close_proxy_pool()
+
+
+def create_worker_pool(num_of_threads=None):
+    # CLIENT_BACKEND = 'async' 时使用异步工作池，不再需要选择线程数
+    if (CLIENT_BACKEND == 'async'):
+        try:
+            pool = AsyncWorkerPool(ASYNC_CONCURRENCY)
+            logger.info(f'⚡  使用异步客户端，最多同时进行 {ASYNC_CONCURRENCY} 个任务')
+            return pool
+        except RuntimeError as error:
+            logger.warning(f'异步客户端不可用，改用工作线程: {error}')
+    return WorkerPool(num_of_threads or get_num_of_threads())
+
+def get_wallet_totals(queue_tasks, queue_results, wallets, balances, journal):
+    # 先获取每个钱包在所有 EVM 链上的总余额，用于跳过空钱包；返回获取失败的钱包
+    failed = set()
+    pending = [wallet for wallet in wallets if wallet not in balances]
+    for wallet in pending:
+        put_task(queue_tasks, ('get_wallet_balance', wallet))
+
+    with alive_bar(len(pending), title='💳 钱包余额', bar='smooth') as bar:
+        for _ in pending:
+            result = queue_results.get()
+            wallet, value = result[1], result[2]
+            if (value is None):
+                failed.add(wallet)
+                balances[wallet] = 0.0
+            else:
+                balances[wallet] = value
+                journal.add_wallet_total(wallet, value)
+            bar()
 
-def get_balances(wallets, ticker=None, output_mode="1"):
-    session, node_process = setup_session()
     print()
+    return failed
+
+
+def log_metrics(file_metrics):
+    # 分别汇总签名、网络和限速等待的耗时，用于判断本次查询的瓶颈在哪里
+    metrics.save(file_metrics)
+    phases = ', '.join(f'{name}: {seconds:.1f}s' for name, seconds in metrics.snapshot()['phases'].items())
+    logger.info(f'⏱️  各阶段耗时: {phases}')
+    for name, title in (('sign_seconds', '签名'), ('http_seconds', '网络'), ('ratelimit_wait_seconds', '限速等待')):
+        summary = metrics.histogram(name, by=None)
+        logger.info(
+            f"📊  {title}: 合计 {summary['sum']:.1f}s | p50 {summary['p50'] * 1000:.0f}ms | p95 {summary['p95'] * 1000:.0f}ms"
+        )
+    total_requests = sum(metrics.counter('requests').values())
+    throttled = sum(metrics.counter('throttled').values())
+    retries = sum(metrics.counter('retries').values())
+    coalesced = sum(metrics.counter('coalesced').values())
+    logger.info(
+        f'📨  请求 {total_requests} 次 | 合并 {coalesced} 次 | 429 {throttled} 次 | 重试 {retries} 次 | 详细统计已写入 {file_metrics}'
+    )
+    proxy_pool = get_proxy_pool()
+    if (proxy_pool is not None):
+        for stats in proxy_pool.stats():
+            if (stats['requests']):
+                logger.info(
+                    f"🛡️  代理 {stats['proxy']}: 请求 {stats['requests']} 次 | 成功率 {stats['success_rate']:.0%} | "
+                    f"429 比例 {stats['throttled_rate']:.0%}{' | 隔离中' if stats['quarantined'] else ''}"
+                )
+
+
+def resolve_ticker_chains(queue_tasks, queue_results, ticker, wallets, balance_chains):
+    # 特定代币查询：根据钱包的全链代币列表，每个钱包只查询持有该代币的链，返回 {钱包: 链列表}
+    wallet_chains = {wallet: balance_chains for wallet in wallets}
+    if (not TICKER_PUSHDOWN):
+        return wallet_chains
+
+    cache = get_cache()
+    exact_chains = cache.symbol_chains(ticker) if cache is not None else {}
+    # 没有缓存全链代币列表的钱包先请求一次全链代币列表（每个钱包一个请求），链多于一条时总请求量少于逐链查询；
+    # 全链模式本身每个钱包只有一个请求，不需要预先获取
+    missing = [wallet for wallet in wallets if wallet not in exact_chains]
+    if (missing and not ALL_CHAIN_BALANCE and len(balance_chains) > 1):
+        for wallet in missing:
+            # 最小金额为 -1：只要持有该代币就查询这条链，金额由逐链查询的结果决定
+            put_task(queue_tasks, ('all_chain_balance', wallet, ticker, -1))
+        with alive_bar(len(missing), title=f'🎯 {ticker} 所在链', bar='smooth') as bar:
+            for _ in missing:
+                _, wallet, balances_by_chain = queue_results.get()
+                # 获取失败的钱包仍然查询所有链
+                if (balances_by_chain is not None):
+                    exact_chains[wallet] = {chain for chain, coins in balances_by_chain.items() if coins}
+                bar()
+        print()
 
-    print_separator("数据获取")
-    logger.info('🔍  正在获取钱包已使用的 EVM 链列表以及钱包在其中的余额...')
-    chains = list(get_chains(node_process, session, wallets))
-    logger.info('🔍  正在获取池子列表以及钱包在其中的余额...')
-    pools = get_pools(node_process, session, wallets)
-    logger.success(f'🎉  完成！已使用的 EVM 链和池子的合计数量为: {len(chains) + len(pools)}')
+    for wallet in wallets:
+        if (wallet in exact_chains):
+            wallet_chains[wallet] = [chain for chain in balance_chains if chain in exact_chains[wallet]]
+
+    skipped = len(wallets) * len(balance_chains) - sum(len(chains) for chains in wallet_chains.values())
+    if (skipped):
+        logger.info(f'🎯  根据全链代币列表，跳过 {skipped} 个不持有 {ticker} 的 (钱包, 链) 查询')
+    return wallet_chains
+
+
+def get_balances(pool, wallets, ticker=None, output_mode="1", refresh=False, min_amount=None, output_file=None, interactive=True):
+    if (min_amount is None):
+        min_amount = get_minimal_amount_in_usd()
+    if (output_file is None):
+        output_file = file_ndjson if OUTPUT_FORMAT == 'ndjson' else file_json
+    queue_tasks = pool.queue_tasks
+    queue_results = pool.queue_results
     print()
 
-    min_amount = get_minimal_amount_in_usd()
-    num_of_threads = get_num_of_threads()
-    if output_mode == "1":
-        selected_chains = chains + [pool for pool in pools]
-    else:
-        selected_chains = []
+    # 断点续查：跳过上次中断前已经完成并写入断点日志的任务
+    journal = CheckpointJournal(os.path.splitext(output_file)[0] + '.journal')
+    run_key = journal.make_run_key(wallets, ticker, min_amount)
+    done_chain_balances, done_totals = journal.load(run_key)
+    resume = False
+    if done_chain_balances or done_totals:
+        completed = len(done_chain_balances) + len(done_totals)
+        if (interactive):
+            resume = get_resume_choice(completed)
+        else:
+            # 无交互模式下重新运行同样的命令即从断点继续
+            resume = True
+            logger.info(f'♻️  从断点继续，已完成 {completed} 项')
+    if not resume:
+        done_chain_balances, done_totals = {}, {}
+    journal.start(run_key, resume)
 
+    start_time = time()
+    metrics.reset()
+    print_separator("数据获取")
+    logger.info('💰  正在获取每个钱包在所有 EVM 链上的余额...')
+    balances = dict(done_totals)
+    with metrics.phase('totals'):
+        failed_totals = get_wallet_totals(queue_tasks, queue_results, wallets, balances, journal)
+
+    # 总余额不超过最小金额的钱包不再逐链查询；总余额获取失败的钱包仍然逐链查询
+    scan_wallets = wallets
+    if (PRUNE_EMPTY_WALLETS):
+        scan_wallets = [wallet for wallet in wallets if wallet in failed_totals or balances[wallet] > min_amount]
+        if (len(scan_wallets) < len(wallets)):
+            logger.info(f'🧹  {len(wallets) - len(scan_wallets)} 个钱包的总余额不超过 ${min_amount}，跳过逐链和池子查询')
+
+    # 增量刷新：总余额基本没变的钱包沿用上次的逐链结果，不再重新扫描
+    previous = {}
+    if (refresh and ticker is None and output_mode == "1"):
+        previous = load_previous_balances(output_file)
+        if not previous:
+            logger.warning(f'⚠️  未找到可用的上次详细模式结果 {output_file}，将完整扫描所有钱包')
+    carried_wallets = [
+        wallet for wallet in scan_wallets
+        if wallet in previous and wallet not in failed_totals and abs(balances[wallet] - previous[wallet].get('total_all_chains', 0)) <= max(
+            REFRESH_TOLERANCE_USD, abs(previous[wallet].get('total_all_chains', 0)) * REFRESH_TOLERANCE_RATIO
+        )
+    ]
+    if (carried_wallets):
+        scan_wallets = [wallet for wallet in scan_wallets if wallet not in carried_wallets]
+        logger.info(f'♻️  {len(carried_wallets)} 个钱包的总余额没有明显变化，沿用上次结果；{len(scan_wallets)} 个钱包需要重新扫描')
+
+    # 流式输出时池子在余额阶段与各链余额一起按钱包获取，写出后即释放，池子数据不会随钱包数量累积
+    stream_pools = (OUTPUT_FORMAT == 'ndjson' and output_mode == "1")
+    chains, pools = [], {}
+    if output_mode == "1" and scan_wallets:
+        logger.info('🔍  正在获取钱包已使用的 EVM 链列表、池子列表以及钱包在其中的余额...')
+        chains, pools = get_chains_and_pools(queue_tasks, queue_results, scan_wallets, with_pools=not stream_pools)
+        chains = list(chains)
+        logger.success(f'🎉  完成！已使用的 EVM 链和池子的合计数量为: {len(chains) + len(pools)}')
+        print()
+
+    selected_chains = chains + [pool for pool in pools]
     coins = {chain: dict() for chain in selected_chains}
     coins.update(pools)
     pools_names = [pool for pool in pools]
-
-    queue_tasks = Queue()
-    queue_results = Queue()
-
-    threads = []
-    for _ in range(num_of_threads):
-        th = threading.Thread(target=worker, args=(queue_tasks, queue_results))
-        threads.append(th)
-        th.start()
-
-    start_time = time()
-    for chain_id, chain in enumerate(selected_chains):
-        if (chain not in pools_names):
-            logger.info(f'🌐  [{chain_id + 1}/{len(selected_chains) - len(set(selected_chains) & set(pools_names))}] 正在获取 {chain.upper()} 网络的余额...')
-
-            for wallet in wallets:
-                queue_tasks.put(('chain_balance', wallet, chain, ticker, min_amount))
-
-            with alive_bar(len(wallets), title=f'📊 {chain.upper()}', bar='smooth') as bar:
-                for wallet in wallets:
-                    result = queue_results.get()
-                    coins[result[0]][result[1]] = result[2]
-                    bar()
-
-    print()
-    logger.info('💰  正在获取每个钱包在所有 EVM 链上的余额')
-    for wallet in wallets:
-        queue_tasks.put(('get_wallet_balance', wallet))
-
-    balances = {}
-    with alive_bar(len(wallets), title='💳 钱包余额', bar='smooth') as bar:
-        for wallet in wallets:
-            result = queue_results.get()
-            balances[result[0]] = result[1]
-            bar()
-
-    queue_tasks.put(('done',))
-    for th in threads:
-        th.join()
-
-    if (ticker is None):
-        if output_mode == "1":
-            save_full_to_json(wallets, selected_chains, coins, balances, file_json)
+    balance_chains = [chain for chain in selected_chains if chain not in pools_names]
+
+    # 沿用的钱包保留上次的逐链明细和更新时间，其余钱包的更新时间为本次查询时间
+    updated_at = {}
+    if (output_mode == "1" and ticker is None):
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        updated_at = {wallet: now for wallet in wallets}
+    for wallet in carried_wallets:
+        updated_at[wallet] = previous[wallet].get('updated_at')
+        for chain, chain_data in previous[wallet]['chains'].items():
+            if (chain not in coins):
+                selected_chains.append(chain)
+                coins[chain] = {}
+            coins[chain][wallet] = [token_table.from_dict(chain, coin) for coin in chain_data['coins']]
+
+    wallet_chains = {wallet: balance_chains for wallet in scan_wallets}
+    if (ticker is not None and balance_chains):
+        wallet_chains = resolve_ticker_chains(queue_tasks, queue_results, ticker, scan_wallets, balance_chains)
+        if (ALL_CHAIN_BALANCE):
+            # 全链模式每个钱包只有一个请求，只能整体跳过不持有该代币的钱包
+            wallet_chains = {wallet: balance_chains if chains else [] for wallet, chains in wallet_chains.items()}
+    chain_expected = {chain: 0 for chain in balance_chains}
+    for chains in wallet_chains.values():
+        for chain in chains:
+            chain_expected[chain] += 1
+
+    chain_progress = {chain: 0 for chain in balance_chains}
+    for (chain, wallet), balance in done_chain_balances.items():
+        if (chain in wallet_chains.get(wallet, [])):
+            coins[chain][wallet] = [token_table.from_dict(chain, coin) for coin in balance]
+            chain_progress[chain] += 1
+
+    # 流式输出：某个钱包的所有任务完成后立即写出一行，并释放它占用的内存
+    stream_writer = None
+    if (OUTPUT_FORMAT == 'ndjson'):
+        stream_writer = BalanceStreamWriter(output_file, selected_chains, ticker)
+    # 快照：每个钱包完成后同时写入 balances.db，保留每次查询的历史
+    snapshot_writer = None
+    if (SNAPSHOT_ENABLED):
+        snapshot_writer = SnapshotWriter(selected_chains, ticker, min_amount)
+
+    # 流式输出时按钱包获取的池子 {钱包: {池子: 代币列表}}，只保存尚未写出的钱包
+    wallet_pools = {}
+
+    def finish_wallet(wallet):
+        # 钱包所在的池子只加入该钱包的输出，其他钱包不输出这些池子
+        wallet_coins, wallet_columns = coins, selected_chains
+        own_pools = wallet_pools.pop(wallet, None)
+        if (own_pools):
+            wallet_coins = dict(coins)
+            wallet_coins.update({name: {wallet: holdings} for name, holdings in own_pools.items()})
+            wallet_columns = selected_chains + list(own_pools)
+        if (snapshot_writer is not None):
+            snapshot_writer.write(wallet, wallet_coins, balances, updated_at, wallet_columns)
+        if (stream_writer is not None):
+            stream_writer.write(wallet, wallet_coins, balances, updated_at, wallet_columns)
+            for chain in selected_chains:
+                coins[chain].pop(wallet, None)
+
+    def wallet_tasks(wallet):
+        if (ALL_CHAIN_BALANCE and balance_chains):
+            # 全链模式：每个钱包只发一次请求，请求量约为逐链查询的 1/链数
+            if any((chain, wallet) not in done_chain_balances for chain in wallet_chains[wallet]):
+                yield ('all_chain_balance', wallet, ticker, min_amount)
         else:
-            save_full_to_json(wallets, [], {}, balances, file_json)
+            for chain in wallet_chains[wallet]:
+                if ((chain, wallet) not in done_chain_balances):
+                    yield ('chain_balance', wallet, chain, ticker, min_amount)
+        if (stream_pools):
+            yield ('get_pool', wallet)
+
+    # 所有任务一次性放入同一个队列，
+    # 线程始终有活可干，不会因为某条链上一个慢钱包而全部停下等待。
+    # 流式输出时按钱包依次放入任务，每个钱包的任务连续完成后即可写出并释放，
+    # 同时留在内存中的只有正在查询的少数钱包；否则逐链查询时按链依次放入，每条链尽早完成
+    if (stream_writer is not None or (ALL_CHAIN_BALANCE and balance_chains)):
+        pending = (task for wallet in scan_wallets for task in wallet_tasks(wallet))
     else:
-        if output_mode == "1":
-            save_selected_to_json(wallets, selected_chains, coins, balances, ticker, file_json)
+        pending = (
+            ('chain_balance', wallet, chain, ticker, min_amount)
+            for chain in balance_chains for wallet in scan_wallets
+            if chain in wallet_chains[wallet] and (chain, wallet) not in done_chain_balances
+        )
+    total_tasks = 0
+    wallet_remaining = {wallet: 0 for wallet in wallets}
+    for task in pending:
+        put_task(queue_tasks, task)
+        wallet_remaining[task[1]] += 1
+        total_tasks += 1
+    for wallet in wallets:
+        if (wallet_remaining[wallet] == 0):
+            finish_wallet(wallet)
+
+    if (balance_chains):
+        logger.info(f'🌐  正在获取 {len(scan_wallets)} 个钱包在 {len(balance_chains)} 个网络上的余额...')
+    finished_chains = len([chain for chain in balance_chains if chain_progress[chain] == chain_expected[chain]])
+    failed_chain_balances = 0
+
+    def add_chain_balance(chain, wallet, balance):
+        nonlocal finished_chains, failed_chain_balances
+        if (balance is None):
+            # 获取失败的 (钱包, 链) 按空余额输出，但不写入断点日志，从断点继续时会重新查询
+            coins[chain][wallet] = []
+            failed_chain_balances += 1
+        else:
+            coins[chain][wallet] = balance
+            journal.add_chain_balance(wallet, chain, balance)
+        chain_progress[chain] += 1
+        bar.text(f'{chain.upper()} {chain_progress[chain]}/{chain_expected[chain]}')
+        if (chain_progress[chain] == chain_expected[chain]):
+            finished_chains += 1
+            logger.info(f'🌐  [{finished_chains}/{len(balance_chains)}] {chain.upper()} 网络的余额已获取完成')
+
+    balances_started = time()
+    if (total_tasks):
+        with alive_bar(total_tasks, title='📊 余额', bar='smooth') as bar:
+            for _ in range(total_tasks):
+                result = queue_results.get()
+                if (result[0] == 'chain_balance'):
+                    chain, wallet = result[1], result[2]
+                    add_chain_balance(chain, wallet, result[3])
+                elif (result[0] == 'get_pool'):
+                    wallet = result[1]
+                    wallet_pools[wallet] = result[2]
+                else:
+                    wallet, balances_by_chain = result[1], result[2]
+                    for chain in wallet_chains[wallet]:
+                        if ((chain, wallet) not in done_chain_balances):
+                            add_chain_balance(
+                                chain, wallet, None if balances_by_chain is None else balances_by_chain.get(chain, [])
+                            )
+                wallet_remaining[wallet] -= 1
+                if (wallet_remaining[wallet] == 0):
+                    finish_wallet(wallet)
+                bar()
+        print()
+    metrics.add_phase('balances', time() - balances_started)
+
+    with metrics.phase('output'):
+        if (snapshot_writer is not None):
+            snapshot_writer.close()
+            logger.info(f'🗄️  本次结果已写入 {file_snapshot}（批次 {snapshot_writer.run_id}）')
+        if (stream_writer is not None):
+            stream_writer.close()
+        elif (ticker is None):
+            save_full_to_json(wallets, selected_chains, coins, balances, output_file, updated_at)
         else:
-            save_selected_to_json(wallets, [], {}, balances, ticker, file_json)
+            save_selected_to_json(wallets, selected_chains, coins, balances, ticker, output_file)
+    failed = failed_chain_balances + len(failed_totals)
+    if (failed):
+        # 保留断点日志：再次以相同的参数查询并选择从断点继续，只会重新查询失败的项
+        journal.close()
+        logger.warning(f'⚠️  {failed} 项查询失败，结果中按零余额计算；已保留断点日志，再次运行相同的查询可只重新查询失败的项')
+    else:
+        journal.clear()
 
-    # 统计输出（美化版+表格）
-    from termcolor import colored
-    try:
-        from tabulate import tabulate
-        use_tabulate = True
-    except ImportError:
-        use_tabulate = False
-        logger.warning("未安装 tabulate 库，表格美化功能不可用。可通过 pip install tabulate 安装。")
+    # 统计输出：汇总信息和余额最高的钱包，其余钱包分页显示
     print()
-
     print_separator("统计结果")
     print()
-    
-    total_wallets = len(wallets)
-    total_balance = sum(balances.values())
-    nonzero_wallets = [w for w, v in balances.items() if v > 0]
-    
-    # 统计信息卡片
-    print(colored("╭" + "─"*25 + "╮" + " " + "╭" + "─"*25 + "╮", "magenta"))
-    print(colored("│", "magenta") + colored(f"  💼 钱包总数", "yellow", attrs=["bold"]) + colored(" "*12, "magenta") + colored("│", "magenta") + 
-          colored(" │", "magenta") + colored(f"  💰 总余额", "yellow", attrs=["bold"]) + colored(" "*14, "magenta") + colored("│", "magenta"))
-    print(colored("│", "magenta") + colored(f"  {total_wallets:>8}", "white", attrs=["bold"]) + colored(" "*15, "magenta") + colored("│", "magenta") + 
-          colored(" │", "magenta") + colored(f"  ${total_balance:>10.2f}", "magenta", attrs=["bold"]) + colored(" "*12, "magenta") + colored("│", "magenta"))
-    print(colored("╰" + "─"*25 + "╯" + " " + "╰" + "─"*25 + "╯", "magenta"))
-    print()
-    
-    print(colored("╭" + "─"*25 + "╮", "magenta"))
-    print(colored("│", "magenta") + colored(f"  🎯 有余额钱包", "yellow", attrs=["bold"]) + colored(" "*10, "magenta") + colored("│", "magenta"))
-    print(colored("│", "magenta") + colored(f"  {len(nonzero_wallets):>8}", "white", attrs=["bold"]) + colored(" "*15, "magenta") + colored("│", "magenta"))
-    print(colored("╰" + "─"*25 + "╯", "magenta"))
-    print()
-
-    # 表格输出
-    print(colored("📋  详细余额列表", "cyan", attrs=["bold"]))
-    print()
-    
-    table_data = []
-    for w, v in balances.items():
-        status_icon = "✅" if v > 0 else "❌"
-        status_color = "green" if v > 0 else "red"
-        table_data.append([
-            w,
-            f"${v:.2f}",
-            colored(status_icon, status_color)
-        ])
-    
-    headers = [
-        colored("钱包地址", "cyan", attrs=["bold"]), 
-        colored("余额(USD)", "cyan", attrs=["bold"]), 
-        colored("状态", "cyan", attrs=["bold"])
-    ]
-    
-    if use_tabulate:
-        # 为tabulate创建带颜色的数据
-        colored_table_data = []
-        for row in table_data:
-            addr_color = "yellow" if float(row[1].replace('$', '')) > 0 else "grey"
-            bal_color = "magenta" if float(row[1].replace('$', '')) > 0 else "red"
-            colored_table_data.append([
-                colored(row[0], addr_color, attrs=["bold"]),
-                colored(row[1], bal_color, attrs=["bold"]),
-                row[2]  # 状态已经是colored的
-            ])
-        
-        print(tabulate(
-            colored_table_data,
-            headers=headers,
-            tablefmt="grid",
-            stralign="left",
-            numalign="right"
-        ))
-    else:
-        # 自定义表格格式
-        print(colored("┌" + "─"*44 + "┬" + "─"*15 + "┬" + "─"*8 + "┐", "cyan"))
-        print(colored("│", "cyan") + colored(f"{'钱包地址':^44}", "cyan", attrs=["bold"]) + 
-              colored("│", "cyan") + colored(f"{'余额(USD)':^15}", "cyan", attrs=["bold"]) + 
-              colored("│", "cyan") + colored(f"{'状态':^8}", "cyan", attrs=["bold"]) + colored("│", "cyan"))
-        print(colored("├" + "─"*44 + "┼" + "─"*15 + "┼" + "─"*8 + "┤", "cyan"))
-        
-        for row in table_data:
-            # 地址设置为黄色，余额设置为紫色
-            addr_str = colored(f"{row[0]:^44}", "yellow", attrs=["bold"]) if float(row[1].replace('$', '')) > 0 else colored(f"{row[0]:^44}", "grey")
-            bal_str = colored(f"{row[1]:^15}", "magenta", attrs=["bold"]) if float(row[1].replace('$', '')) > 0 else colored(f"{row[1]:^15}", "red")
-            status_str = colored(f"{row[2]:^8}", "green") if float(row[1].replace('$', '')) > 0 else colored(f"{row[2]:^8}", "red")
-            print(colored("│", "cyan") + addr_str + colored("│", "cyan") + bal_str + colored("│", "cyan") + status_str + colored("│", "cyan"))
-        
-        print(colored("└" + "─"*44 + "┴" + "─"*15 + "┴" + "─"*8 + "┘", "cyan"))
+    render_summary(balances, output_file, page_size=None if interactive else 0)
 
-    print()
-    logger.success(f'🎉  完成！查询结果已生成至 {file_json}')
+    logger.success(f'🎉  完成！查询结果已生成至 {output_file}')
     logger.info(f'⏱️  耗时: {round((time() - start_time) / 60, 1)} 分钟')
+    rates = ', '.join(f'{path}: {rate} 次/秒' for path, rate in current_rates().items())
+    logger.info(f'📈  各接口当前速率: {rates}')
+    log_metrics(os.path.splitext(output_file)[0] + '.metrics.json')
     print_end_separator()
     print()
 
+def parse_args():
+    parser = argparse.ArgumentParser(description='DeBank 余额查询；不带参数时进入交互模式，指定 --addresses 时无交互运行')
+    parser.add_argument('--addresses', help='地址文件，每行一个地址（# 开头的行会被忽略）')
+    parser.add_argument('--shard-index', type=int, default=0, help='本机处理第几个分片（从 0 开始）')
+    parser.add_argument('--shard-count', type=int, default=1, help='分片总数，多台机器各自处理一个分片')
+    parser.add_argument('--threads', type=int, default=1, help='工作线程数量（CLIENT_BACKEND = \'async\' 时忽略）')
+    parser.add_argument('--output', default=None, help='结果文件路径，默认 balances.json（分片时自动加上分片编号）')
+    parser.add_argument('--mode', choices=('detail', 'total'), default='detail', help='detail：各链和池子余额；total：仅总余额')
+    parser.add_argument('--ticker', default=None, help='只查询该代币的余额')
+    parser.add_argument('--min-amount', type=float, default=0.01, help='最小金额（美元），0 表示不过滤')
+    parser.add_argument('--refresh', action='store_true', help='增量刷新，只重新扫描总余额有变化的钱包')
+    args = parser.parse_args()
+    if (args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count):
+        parser.error('--shard-index 必须在 0 到 --shard-count - 1 之间')
+    return args
+
+
+def load_addresses(path):
+    wallets = []
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            wallet = line.strip().lower()
+            if (wallet and not wallet.startswith('#') and wallet not in seen):
+                seen.add(wallet)
+                wallets.append(wallet)
+    return wallets
+
+
+def shard_wallets(wallets, shard_index, shard_count):
+    # 按地址哈希分片，与地址文件中的顺序无关，各台机器使用同一份地址文件即可
+    return [wallet for wallet in wallets if zlib.crc32(wallet.encode()) % shard_count == shard_index]
+
+
+def run_headless(args):
+    wallets = load_addresses(args.addresses)
+    if (args.shard_count > 1):
+        wallets = shard_wallets(wallets, args.shard_index, args.shard_count)
+        logger.info(f'🧩  分片 {args.shard_index + 1}/{args.shard_count}：本机处理 {len(wallets)} 个地址')
+    if not wallets:
+        logger.error('❌  没有需要查询的地址')
+        return
+
+    output_file = args.output
+    if (output_file is None):
+        output_file = file_ndjson if OUTPUT_FORMAT == 'ndjson' else file_json
+        if (args.shard_count > 1):
+            base, ext = os.path.splitext(output_file)
+            output_file = f'{base}.shard{args.shard_index}-of-{args.shard_count}{ext}'
+
+    # 与交互模式的 get_minimal_amount_in_usd 相同：最小金额为 0 表示不过滤，价值为零的代币也输出
+    min_amount = -1 if args.min_amount == 0 else args.min_amount
+
+    pool = create_worker_pool(args.threads)
+    try:
+        get_balances(
+            pool, wallets, args.ticker.upper() if args.ticker else None, output_mode="1" if args.mode == 'detail' else "2",
+            refresh=args.refresh, min_amount=min_amount, output_file=output_file, interactive=False,
+        )
+    finally:
+        pool.shutdown()
+
+
 def main():
+    args = parse_args()
+    if (args.addresses):
+        run_headless(args)
+        return
+
     print_banner()
 
     print(colored("📝  请输入 EVM 钱包地址列表（每行一个地址，输入完后两次回车确认）：", "yellow", attrs=["bold"]))
@@ -469,18 +950,26 @@ def main():
 
     output_mode = choose_output_mode()
 
+    # 线程池、会话和签名服务只创建一次，所有菜单操作复用，程序退出时关闭
+    pool = create_worker_pool()
+    atexit.register(pool.shutdown)
+    print()
+
     while True:
         action = get_action()
 
         match action:
             case '💲 -获取钱包中所有EVM链的代币余额':
-                get_balances(wallets, output_mode=output_mode)
+                get_balances(pool, wallets, output_mode=output_mode)
             case '🪙 -仅获取特定代币的余额':
                 ticker = get_ticker()
-                get_balances(wallets, ticker, output_mode=output_mode)
+                get_balances(pool, wallets, ticker, output_mode=output_mode)
+            case '🔄 -增量刷新':
+                get_balances(pool, wallets, output_mode=output_mode, refresh=True)
             case '📖 -帮助':
                 show_help()
             case '📤 -退出':
+                pool.shutdown()
                 print("\n" + colored("👋 感谢使用，再见！", "green", attrs=["bold", "reverse"]))
                 exit()
             case _:
@@ -0,0 +1,73 @@
+import os
+import sys
+
+from termcolor import colored
+
+# 确保可以从任何路径运行时都能正确引用本地 app 目录下的模块
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app.signer import NodeSigner, WasmSigner
+
+# 固定的签名输入：(payload, method, path, nonce, ts)
+CASES = [
+    ({'user_addr': '0x0000000000000000000000000000000000000000', 'chain': 'eth'}, 'GET', '/token/balance_list',
+     'n_0LknmB7aJePWhQezXR3SFQeLmf0Q3wDDnSpgDJxS', 1690894427),
+    ({'user_addr': '0xd328426a8e0bcdbbef89e96a91911eff68734e84', 'chain': 'bsc'}, 'GET', '/token/balance_list',
+     'n_dnNAOSWvzwmQiOQu52o7i0ohyaT7vnL89JvKD1tI', 1700000000),
+    ({'id': '0xd328426a8e0bcdbbef89e96a91911eff68734e84'}, 'GET', '/user/used_chains',
+     'n_aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa', 1710000000),
+    ({'user_addr': '0xd328426a8e0bcdbbef89e96a91911eff68734e84'}, 'GET', '/portfolio/project_list',
+     'nc_0123456789abcdef0123456789abcdef01234567', 1720000000),
+    ({'user_addr': '0xd328426a8e0bcdbbef89e96a91911eff68734e84'}, 'GET', '/asset/net_curve_24h',
+     'n_ZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZZ', 1730000000),
+    ({}, 'get', '/user/used_chains', 'n_emptypayloademptypayloademptypayload01', 1),
+    ({'user_addr': None, 'chain': 'arb', 'is_all': True}, 'POST', '/token/balance_list',
+     'n_nonevalueandbooleanvalue0000000000000', 1690894427),
+]
+
+# 不固定 nonce 时，两个全新实例生成的 nonce 序列也应一致
+GENERATED_NONCE_ROUNDS = 5
+
+
+def check_parity():
+    node_signer = NodeSigner()
+    wasm_signer = WasmSigner()
+    failures = 0
+
+    try:
+        for payload, method, path, nonce, ts in CASES:
+            expected = node_signer.sign(payload, method, path, nonce, ts)
+            actual = wasm_signer.sign(payload, method, path, nonce, ts)
+            if expected == actual:
+                print(colored(f"✅ {method} {path} {payload}", "green"))
+            else:
+                failures += 1
+                print(colored(f"❌ {method} {path} {payload}", "red", attrs=["bold"]))
+                print(colored(f"   node: {expected}", "white"))
+                print(colored(f"   wasm: {actual}", "white"))
+
+        # 上面的用例都固定了 nonce，不会消耗随机数状态，两个实例此时仍从同一状态开始
+        payload = {'user_addr': '0xd328426a8e0bcdbbef89e96a91911eff68734e84', 'chain': 'eth'}
+        for i in range(GENERATED_NONCE_ROUNDS):
+            expected = node_signer.sign(payload, 'GET', '/token/balance_list', ts=1690894427 + i)
+            actual = wasm_signer.sign(payload, 'GET', '/token/balance_list', ts=1690894427 + i)
+            if expected == actual:
+                print(colored(f"✅ 生成的 nonce #{i + 1}: {actual['nonce']}", "green"))
+            else:
+                failures += 1
+                print(colored(f"❌ 生成的 nonce #{i + 1}", "red", attrs=["bold"]))
+                print(colored(f"   node: {expected}", "white"))
+                print(colored(f"   wasm: {actual}", "white"))
+    finally:
+        node_signer.close()
+        wasm_signer.close()
+
+    return failures
+
+
+if __name__ == '__main__':
+    failures = check_parity()
+    total = len(CASES) + GENERATED_NONCE_ROUNDS
+    if failures:
+        print(colored(f"\n❌ {failures}/{total} 项签名不一致", "red", attrs=["bold"]))
+        sys.exit(1)
+    print(colored(f"\n🎉 全部 {total} 项签名一致", "green", attrs=["bold"]))
@@ -0,0 +1,172 @@
+import os
+import sys
+import argparse
+
+from termcolor import colored
+
+# 确保可以从任何路径运行时都能正确引用本地 app 目录下的模块
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from app.config import file_snapshot
+from app.snapshot import SnapshotStore
+
+try:
+    from tabulate import tabulate
+except ImportError:
+    tabulate = None
+
+
+def print_rows(headers, rows):
+    if not rows:
+        print(colored("（没有结果）", "yellow"))
+        return
+    if tabulate is not None:
+        print(tabulate(rows, headers=headers, tablefmt="rounded_outline", floatfmt=".2f"))
+        return
+    print(colored(' | '.join(headers), "cyan", attrs=["bold"]))
+    for row in rows:
+        print(' | '.join('' if value is None else str(value) for value in row))
+
+
+def detail_run(store, run_id):
+    # 默认使用最近一次包含链明细的批次（简单模式的批次只有总余额）
+    if run_id is not None:
+        return run_id
+    row = store.conn.execute(
+        "SELECT id FROM runs WHERE finished_at IS NOT NULL AND mode != 'total' ORDER BY id DESC LIMIT 1"
+    ).fetchone()
+    if row is None:
+        sys.exit(colored("❌ balances.db 中还没有包含链明细的查询结果", "red"))
+    return row[0]
+
+
+def cmd_runs(store, args):
+    rows = store.conn.execute(
+        'SELECT id, started_at, finished_at, mode, ticker, min_amount, wallet_count, total_usd '
+        'FROM runs ORDER BY id DESC LIMIT ?',
+        (args.limit,)
+    ).fetchall()
+    print_rows(['批次', '开始时间', '结束时间', '模式', '代币', '最小金额', '钱包数', '总余额(USD)'], rows)
+
+
+def cmd_holders(store, args):
+    run_id = detail_run(store, args.run)
+    table = 'pools' if args.pools else 'chain_tokens'
+    where = ['run_id = ?']
+    params = [run_id]
+    if args.contract:
+        where.append('contract = ?')
+        params.append(args.contract.lower())
+    else:
+        where.append('ticker = ?')
+        params.append(args.ticker.upper())
+    if args.chain:
+        where.append('chain = ?')
+        params.append(args.chain)
+    params += [args.min_usd, args.limit]
+    rows = store.conn.execute(
+        f'SELECT wallet, chain, ticker, contract, amount, usd FROM {table} '
+        f'WHERE {" AND ".join(where)} AND COALESCE(usd, 0) >= ? ORDER BY usd DESC LIMIT ?',
+        params
+    ).fetchall()
+    print(colored(f"🔎  批次 {run_id} 中的持有者", "cyan", attrs=["bold"]))
+    print_rows(['钱包', '链', '代币', '合约地址', '数量', '价值(USD)'], rows)
+
+
+def cmd_wallet(store, args):
+    wallet = args.address.lower()
+    run_id = detail_run(store, args.run)
+    rows = store.conn.execute(
+        'SELECT chain, ticker, contract, amount, price, usd FROM chain_tokens WHERE wallet = ? AND run_id = ? '
+        'ORDER BY usd DESC',
+        (wallet, run_id)
+    ).fetchall()
+    rows += store.conn.execute(
+        "SELECT pool || ' (' || chain || ')', ticker, contract, amount, price, usd FROM pools "
+        'WHERE wallet = ? AND run_id = ? ORDER BY usd DESC',
+        (wallet, run_id)
+    ).fetchall()
+    print(colored(f"👛  {wallet} 在批次 {run_id} 中的持仓", "cyan", attrs=["bold"]))
+    print_rows(['链/池子', '代币', '合约地址', '数量', '价格', '价值(USD)'], rows)
+
+    history = store.conn.execute(
+        'SELECT w.run_id, r.started_at, w.total_all_chains FROM wallets w JOIN runs r ON r.id = w.run_id '
+        'WHERE w.wallet = ? AND r.finished_at IS NOT NULL ORDER BY w.run_id DESC LIMIT ?',
+        (wallet, args.limit)
+    ).fetchall()
+    print(colored("📈  总余额历史", "cyan", attrs=["bold"]))
+    print_rows(['批次', '查询时间', '总余额(USD)'], history)
+
+
+def cmd_diff(store, args):
+    latest = store.latest_runs(1)
+    to_run = args.to if args.to is not None else (latest[0] if latest else None)
+    from_run = args.from_run
+    if from_run is None and to_run is not None:
+        # 默认与上一次查询对比；指定 --since 时取该时间之前的最后一次查询
+        sql = 'SELECT id FROM runs WHERE finished_at IS NOT NULL AND id < ?'
+        params = [to_run]
+        if args.since:
+            sql += ' AND started_at <= ?'
+            params.append(args.since)
+        row = store.conn.execute(sql + ' ORDER BY id DESC LIMIT 1', params).fetchone()
+        from_run = row[0] if row is not None else None
+    if to_run is None or from_run is None:
+        sys.exit(colored("❌ balances.db 中没有可以对比的两次查询", "red"))
+
+    # 通过 (run_id, wallet) 主键逐个钱包对比，不需要扫描整张表；新增和消失的钱包也计入变化
+    rows = store.conn.execute(
+        'SELECT * FROM ('
+        'SELECT b.wallet, a.total_all_chains AS before, b.total_all_chains AS after, '
+        'COALESCE(b.total_all_chains, 0) - COALESCE(a.total_all_chains, 0) AS change '
+        'FROM wallets b LEFT JOIN wallets a ON a.run_id = ? AND a.wallet = b.wallet WHERE b.run_id = ? '
+        'UNION ALL '
+        'SELECT a.wallet, a.total_all_chains, NULL, -COALESCE(a.total_all_chains, 0) FROM wallets a '
+        'WHERE a.run_id = ? AND NOT EXISTS (SELECT 1 FROM wallets b WHERE b.run_id = ? AND b.wallet = a.wallet)'
+        ') WHERE ABS(change) >= ? ORDER BY ABS(change) DESC LIMIT ?',
+        (from_run, to_run, from_run, to_run, args.min_change, args.limit)
+    ).fetchall()
+    print(colored(f"🔁  批次 {from_run} → {to_run} 总余额变化不小于 ${args.min_change} 的钱包", "cyan", attrs=["bold"]))
+    print_rows(['钱包', '之前(USD)', '之后(USD)', '变化(USD)'], rows)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=f'查询 {os.path.basename(file_snapshot)} 中保存的历史余额')
+    parser.add_argument('--db', default=file_snapshot, help='快照数据库路径')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    runs = subparsers.add_parser('runs', help='列出最近的查询批次')
+    runs.add_argument('--limit', type=int, default=10)
+
+    holders = subparsers.add_parser('holders', help='查询持有某个代币的钱包')
+    token = holders.add_mutually_exclusive_group(required=True)
+    token.add_argument('--ticker', help='代币代号，例如 USDC')
+    token.add_argument('--contract', help='代币合约地址')
+    holders.add_argument('--chain', help='只查询这条链，例如 eth')
+    holders.add_argument('--pools', action='store_true', help='查询池子中的代币，而不是钱包中的代币')
+    holders.add_argument('--run', type=int, default=None, help='批次 ID，默认最近一次')
+    holders.add_argument('--min-usd', type=float, default=0, help='只显示价值不低于该金额的持仓')
+    holders.add_argument('--limit', type=int, default=50)
+
+    wallet = subparsers.add_parser('wallet', help='查询某个钱包的持仓和总余额历史')
+    wallet.add_argument('address')
+    wallet.add_argument('--run', type=int, default=None, help='批次 ID，默认最近一次')
+    wallet.add_argument('--limit', type=int, default=10, help='显示最近多少次的总余额')
+
+    diff = subparsers.add_parser('diff', help='对比两次查询之间总余额的变化')
+    diff.add_argument('--from', dest='from_run', type=int, default=None, help='起始批次 ID，默认上一次')
+    diff.add_argument('--to', type=int, default=None, help='结束批次 ID，默认最近一次')
+    diff.add_argument('--since', help='起始时间，例如 "2024-01-01 00:00:00"，取该时间之前最后一次查询作为起始批次')
+    diff.add_argument('--min-change', type=float, default=1.0, help='只显示变化不小于该金额的钱包')
+    diff.add_argument('--limit', type=int, default=50)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if not os.path.exists(args.db):
+        sys.exit(colored(f"❌ 未找到 {args.db}，请先在 app/config.py 中设置 SNAPSHOT_ENABLED = True 并完成一次查询", "red"))
+    store = SnapshotStore(args.db)
+    try:
+        {'runs': cmd_runs, 'holders': cmd_holders, 'wallet': cmd_wallet, 'diff': cmd_diff}[args.command](store, args)
+    finally:
+        store.close()
@@ -6,7 +6,8 @@ from alive_progress import alive_bar
 
 # 确保可以从任何路径运行时都能正确引用同目录下的 main.py
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from main import get_chains, setup_session, chain_balance, edit_session_headers, send_request
+from main import request_json, put_task, WorkerPool
+from app.config import USED_CHAINS_THREADS
 
 def print_banner():
     """打印精美的横幅"""
@@ -79,7 +80,7 @@ def print_progress(message):
     """打印进度信息"""
     print(colored(f"🔄 {message}", "cyan"))
 
-def get_chain_token_addresses(node_process, session, wallets, chain):
+def get_chain_token_addresses(signer, session, wallets, chain):
     """
     获取指定链上所有钱包持有的代币地址列表
     """
@@ -92,14 +93,7 @@ def get_chain_token_addresses(node_process, session, wallets, chain):
                 'user_addr': wallet,
                 'chain': chain
             }
-            edit_session_headers(node_process, session, payload, 'GET', '/token/balance_list')
-            resp = send_request(
-                node_process, 
-                session=session,
-                method='GET',
-                url=f'https://api.debank.com/token/balance_list?user_addr={wallet}&chain={chain}',
-            )
-            data = resp.json()
+            data = request_json(signer, session, '/token/balance_list', payload)
             
             # 从响应中提取代币地址
             for coin in data.get('data', []):
@@ -114,40 +108,18 @@ def get_chain_token_addresses(node_process, session, wallets, chain):
     
     return list(token_addresses)
 
-def get_chain_tokens(node_process, session, wallets, chain):
+def add_chain_tokens(tokens, coins):
     """
-    获取指定链上所有钱包持有的代币合约地址、余额和名称列表
-    返回: [{"address": ..., "amount": ..., "name": ...}, ...]
+    把一个钱包在某条链上的余额查询结果合并到该链的代币表
+    tokens: {合约地址: {"address": ..., "amount": ..., "name": ...}}，所有钱包查询完成后 list(tokens.values()) 即为该链的代币列表
     """
-    tokens = {}
-    for wallet in wallets:
-        try:
-            payload = {
-                'user_addr': wallet,
-                'chain': chain
-            }
-            edit_session_headers(node_process, session, payload, 'GET', '/token/balance_list')
-            resp = send_request(
-                node_process, 
-                session=session,
-                method='GET',
-                url=f'https://api.debank.com/token/balance_list?user_addr={wallet}&chain={chain}',
-            )
-            data = resp.json()
-            for coin in data.get('data', []):
-                name = coin.get('name', '')
-                address = coin.get('id') or coin.get('address')
-                amount = coin.get('amount', 0)
-                if address:
-                    if address in tokens:
-                        tokens[address]['amount'] += amount
-                    else:
-                        tokens[address] = {'name': name, 'address': address, 'amount': amount}
-        except Exception as e:
-            print_error(f"获取 {wallet} 在 {chain} 的代币信息时出错: {e}")
-            continue
-    # 转为列表
-    return list(tokens.values())
+    for coin in coins:
+        address = coin['contract_address']
+        if address:
+            if address in tokens:
+                tokens[address]['amount'] += coin['amount']
+            else:
+                tokens[address] = {'name': coin['name'] or '', 'address': address, 'amount': coin['amount']}
 
 def print_summary_table(used_chain_data):
     """打印汇总表格"""
@@ -225,11 +197,17 @@ def run_with_wallets(wallets: list[str]):
     print()
     
     print_separator("系统初始")
-    print_progress("正在初始化 DeBank 会话...")
-    session, node_process = setup_session()
+    print_progress("正在初始化 DeBank 会话和工作线程...")
+    # 链列表和各链余额都交给工作线程并发获取，请求速度由共享的请求预算控制
+    pool = WorkerPool(USED_CHAINS_THREADS)
     print_success("DeBank 会话初始化完成")
     print_progress("正在获取钱包使用的链列表...")
-    chains = list(get_chains(node_process, session, wallets))
+    for wallet in wallets:
+        put_task(pool.queue_tasks, ('get_used_chains', wallet))
+    chains = set()
+    for _ in wallets:
+        chains.update(pool.queue_results.get()[2])
+    chains = list(chains)
     print_success(f"发现已使用 {len(chains)} 条链")
     print_end_separator()
     print()
@@ -237,22 +215,34 @@ def run_with_wallets(wallets: list[str]):
     print_separator("余额分析")
     print(colored("正在分析各链余额并收集代币地址信息...", "cyan", attrs=["bold"]))
     min_usd = 0
-    filtered_chains = []
     chain_tokens = {}
+    for chain in chains:
+        for wallet in wallets:
+            # 最小金额为 -1：不按金额过滤，价值为零的代币也要收集到代币列表中
+            put_task(pool.queue_tasks, ('chain_balance', wallet, chain, None, -1))
+    chain_usd = {chain: 0.0 for chain in chains}
+    chain_remaining = {chain: len(wallets) for chain in chains}
+    tokens_by_chain = {chain: {} for chain in chains}
     with alive_bar(len(chains), title="分析链余额", bar="smooth") as bar:
-        for chain in chains:
-            total_usd = 0.0
-            for wallet in wallets:
-                coins = chain_balance(node_process, session, wallet, chain, None, 0)
-                for coin in coins:
-                    if coin['price'] is not None:
-                        total_usd += coin['amount'] * coin['price']
-            if total_usd > min_usd:
-                filtered_chains.append(chain)
-                bar.text(f"收集 {chain} 链代币信息...")
-                tokens = get_chain_tokens(node_process, session, wallets, chain)
-                chain_tokens[chain] = tokens
+        for _ in range(len(chains) * len(wallets)):
+            _, chain, wallet, coins = pool.queue_results.get()
+            if coins is None:
+                print_error(f"获取 {wallet} 在 {chain} 的代币信息失败")
+                coins = []
+            for coin in coins:
+                if coin['price'] is not None:
+                    chain_usd[chain] += coin['amount'] * coin['price']
+            # 代币列表直接由余额查询的结果汇总，不再重新请求
+            add_chain_tokens(tokens_by_chain[chain], coins)
+            chain_remaining[chain] -= 1
+            if chain_remaining[chain] > 0:
+                continue
+            tokens = tokens_by_chain.pop(chain)
+            if chain_usd[chain] > min_usd:
+                chain_tokens[chain] = list(tokens.values())
             bar()
+    pool.shutdown()
+    filtered_chains = [chain for chain in chains if chain in chain_tokens]
     chains = filtered_chains
     print_end_separator()
     print()
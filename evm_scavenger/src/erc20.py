@@ -1,10 +1,13 @@
 import os
 import json
 import time
+from decimal import Decimal
 from web3 import Web3
 from eth_account import Account
 from dotenv import load_dotenv
 from colorama import Fore, Style, init
+from sweep import ChainResult, NonceTracker, sweep_chains
+from multicall import read_tokens
 
 # ========== 初始化 ==========
 init(autoreset=True)
@@ -82,6 +85,10 @@ def print_status(message, status_type="info"):
     color = colors.get(status_type, Fore.WHITE)
     print(f"{color}{icon} {message}{Style.RESET_ALL}")
 
+def format_amount(balance, decimals):
+    """把链上原始余额按精度换算为可读的数量，不经过浮点数"""
+    return format(Decimal(balance).scaleb(-decimals).normalize(), 'f')
+
 def print_token_info(token_name, token_addr, amount, decimals):
     """打印代币信息"""
     print(f"{Fore.GREEN}┌─ 代币信息")
@@ -154,6 +161,113 @@ def load_json_file(path, desc):
         print_status(f"{desc} 文件格式不正确: {path}", "error")
         exit(1)
 
+def process_chain(chain_idx, chain, total_chains, rpc_info, erc20_abi, private_key, from_address, to_address):
+    """转移一条链上的全部 ERC20 代币，在 sweep_chains 的线程中运行，返回该链的 ChainResult"""
+    result = ChainResult()
+    chain_id = chain.get("chain_id") or chain.get("chainIndex")
+    chain_id_str = str(chain_id)
+    try:
+        if chain_id_str not in rpc_info:
+            print_status(f"未在 RPC 列表中找到链 ID: {chain_id}", "warning")
+            result.skip += 1
+            return result
+
+        rpc_url = rpc_info[chain_id_str]
+        # web3 在每次 eth_call、估算 gas 和构建交易前都会查询 chainId，缓存后每条链只查询一次
+        w3 = Web3(Web3.HTTPProvider(rpc_url, cache_allowed_requests=True, cacheable_requests={'eth_chainId'}))
+        nonce = NonceTracker(w3, from_address)
+
+        # 打印链信息头部
+        print_chain_header(chain_id, rpc_url, chain_idx, total_chains)
+        print_status(f"初始 Nonce: {nonce.value}", "info")
+
+        # 获取 ERC20 token 地址列表
+        erc20_tokens_list = []
+        for token in chain.get("tokens", []):
+            token_addr = token.get("address")
+            amount = token.get("amount", 0)
+            try:
+                amount_float = float(amount)
+            except Exception:
+                amount_float = 0
+            if token_addr and amount_float > 0 and str(token_addr).startswith("0x"):
+                erc20_tokens_list.append(token_addr)
+
+        if not erc20_tokens_list:
+            print_status(f"链 {chain_id} 未找到有效的 ERC20 token，跳过\n", "warning")
+            result.skip += 1
+            return result
+
+        print_status(f"发现 {len(erc20_tokens_list)} 个代币需要处理", "info")
+
+        # 一次读取所有代币的链上原始余额和精度，转账使用链上余额而不是 DeBank 的浮点数量，不会留下零头
+        token_infos, batched = read_tokens(w3, erc20_tokens_list, from_address, erc20_abi)
+        if not batched:
+            print_status("该链没有可用的 Multicall3，已逐个读取代币信息", "warning")
+        gas_price = None
+
+        # 同一条链上的代币按顺序处理，保证 nonce 连续
+        for token_idx, token_addr in enumerate(erc20_tokens_list, 1):
+            try:
+                # 显示进度
+                print_progress_bar(token_idx, len(erc20_tokens_list), f"处理代币 {token_idx}/{len(erc20_tokens_list)}")
+
+                token = w3.eth.contract(address=Web3.to_checksum_address(token_addr), abi=erc20_abi)
+
+                info = token_infos.get(token_addr)
+                if info is None:
+                    print_status(f"获取代币 {token_addr} 信息失败", "warning")
+                    result.skip += 1
+                    continue
+                name = info['name'] or info['symbol'] or token_addr
+                decimals = info['decimals']
+                balance = info['balance']
+                human_amount = format_amount(balance, decimals)
+
+                if balance > 0:
+                    if gas_price is None:
+                        gas_price = w3.eth.gas_price
+
+                    # 打印代币信息
+                    print(f"\n{Fore.GREEN}🎯 处理代币 {token_idx}/{len(erc20_tokens_list)}")
+                    print_token_info(name, token_addr, human_amount, decimals)
+
+                    try:
+                        estimated_gas = token.functions.transfer(to_address, balance).estimate_gas({'from': from_address})
+                    except Exception as e:
+                        print_status(f"估算 gas 失败，使用默认值 100,000。错误: {e}", "warning")
+                        estimated_gas = 100000
+
+                    tx = token.functions.transfer(to_address, balance).build_transaction({
+                        'nonce': nonce.value,
+                        'gasPrice': gas_price,
+                        'gas': estimated_gas,
+                        'chainId': chain_id
+                    })
+
+                    if dry_run:
+                        print_status(f"模拟转账 {human_amount} {name} (未发送)", "success")
+                    else:
+                        signed = w3.eth.account.sign_transaction(tx, private_key)
+                        tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
+                        print_status(f"成功转账 {name}！交易哈希: {w3.to_hex(tx_hash)}", "success")
+                    nonce.next()
+                    print_status(f"Nonce 递增至: {nonce.value}\n", "info")
+                    result.success += 1
+                else:
+                    result.skip += 1
+
+            except Exception as e:
+                print_status(f"处理代币 {token_addr} 失败: {e}\n", "error")
+                result.fail += 1
+
+        print()  # 空行分隔
+
+    except Exception as e:
+        print_status(f"处理链 {chain_id_str} 失败: {e}", "error")
+        result.fail += 1
+    return result
+
 def main():
     # 打印启动信息
     print_header()
@@ -184,118 +298,19 @@ def main():
         erc20_abi = json.load(f)
     print_status("ERC20 ABI 加载成功", "success")
     
-    # 开始处理
+    # 开始处理：各条链并发处理，每条链使用自己的 Web3 实例和 nonce
     print_section_header("♻️ 开始批量处理♻️", Fore.GREEN)
-    
-    total_success = 0
-    total_fail = 0
-    total_skip = 0
-    
-    for chain_idx, chain in enumerate(chains_data, 1):
-        try:
-            chain_id = chain.get("chain_id") or chain.get("chainIndex")
-            chain_id_str = str(chain_id)
-            
-            if chain_id_str not in rpc_info:
-                print_status(f"未在 RPC 列表中找到链 ID: {chain_id}", "warning")
-                total_skip += 1
-                continue
-                
-            rpc_url = rpc_info[chain_id_str]
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
-            nonce = w3.eth.get_transaction_count(from_address)
-            
-            # 打印链信息头部
-            print_chain_header(chain_id, rpc_url, chain_idx, len(chains_data))
-            print_status(f"初始 Nonce: {nonce}", "info")
-            
-            # 获取 ERC20 token 地址列表
-            erc20_tokens_list = []
-            asset_balances = {}
-            for token in chain.get("tokens", []):
-                token_addr = token.get("address")
-                amount = token.get("amount", 0)
-                try:
-                    amount_float = float(amount)
-                except Exception:
-                    amount_float = 0
-                if token_addr and amount_float > 0 and str(token_addr).startswith("0x"):
-                    erc20_tokens_list.append(token_addr)
-                    asset_balances[token_addr] = amount_float
-                    
-            if not erc20_tokens_list:
-                print_status(f"链 {chain_id} 未找到有效的 ERC20 token，跳过\n", "warning")
-                total_skip += 1
-                continue
-                
-            print_status(f"发现 {len(erc20_tokens_list)} 个代币需要处理", "info")
-            
-            # 处理代币
-            for token_idx, token_addr in enumerate(erc20_tokens_list, 1):
-                try:
-                    # 显示进度
-                    print_progress_bar(token_idx, len(erc20_tokens_list), f"处理代币 {token_idx}/{len(erc20_tokens_list)}")
-                    
-                    token = w3.eth.contract(address=Web3.to_checksum_address(token_addr), abi=erc20_abi)
-                    
-                    try:
-                        name = token.functions.name().call()
-                        decimals = token.functions.decimals().call()
-                        human_amount = asset_balances[token_addr]
-                        balance = int(human_amount * (10 ** decimals))
-                    except Exception as e:
-                        print_status(f"获取代币 {token_addr} 信息失败: {e}", "warning")
-                        total_skip += 1
-                        continue
-                        
-                    if balance > 0:
-                        gas_price = w3.eth.gas_price
-                        
-                        # 打印代币信息
-                        print(f"\n{Fore.GREEN}🎯 处理代币 {token_idx}/{len(erc20_tokens_list)}")
-                        print_token_info(name, token_addr, human_amount, decimals)
-                        
-                        try:
-                            estimated_gas = token.functions.transfer(to_address, balance).estimate_gas({'from': from_address})
-                        except Exception as e:
-                            print_status(f"估算 gas 失败，使用默认值 100,000。错误: {e}", "warning")
-                            estimated_gas = 100000
-                            
-                        tx = token.functions.transfer(to_address, balance).build_transaction({
-                            'nonce': nonce,
-                            'gasPrice': gas_price,
-                            'gas': estimated_gas,
-                            'chainId': chain_id
-                        })
-                        
-                        if dry_run:
-                            print_status(f"模拟转账 {human_amount} {name} (未发送)", "success")
-                            nonce += 1
-                            print_status(f"Nonce 递增至: {nonce}\n", "info")
-                            total_success += 1
-                        else:
-                            signed = w3.eth.account.sign_transaction(tx, private_key)
-                            tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
-                            print_status(f"成功转账 {name}！交易哈希: {w3.to_hex(tx_hash)}", "success")
-                            nonce += 1
-                            print_status(f"Nonce 递增至: {nonce}\n", "info")
-                            total_success += 1
-                    else:
-                        total_skip += 1
-                        
-                except Exception as e:
-                    print_status(f"处理代币 {token_addr} 失败: {e}\n", "error")
-                    total_fail += 1
-                    
-            print()  # 空行分隔
-            time.sleep(0.5)  # 短暂延迟，让输出更清晰
-            
-        except Exception as e:
-            print_status(f"处理链 {chain_id_str} 失败: {e}", "error")
-            total_fail += 1
+    started = time.time()
+    totals = sweep_chains(
+        chains_data,
+        lambda chain_idx, chain: process_chain(
+            chain_idx, chain, len(chains_data), rpc_info, erc20_abi, private_key, from_address, to_address
+        )
+    )
+    print_status(f"{len(chains_data)} 条链处理完成，用时 {time.time() - started:.1f} 秒", "info")
     
     # 打印总结
-    print_summary(total_success, total_fail, total_skip, dry_run)
+    print_summary(totals.success, totals.fail, totals.skip, dry_run)
 
 if __name__ == "__main__":
     main()
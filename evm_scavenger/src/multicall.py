@@ -0,0 +1,120 @@
+from web3 import Web3
+from eth_abi import decode
+
+# Multicall3 在绝大多数 EVM 链上部署于同一地址（https://www.multicall3.com）
+MULTICALL3_ADDRESS = Web3.to_checksum_address('0xcA11bde05977b3631167028862bE2a173976CA11')
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"name": "target", "type": "address"},
+                    {"name": "allowFailure", "type": "bool"},
+                    {"name": "callData", "type": "bytes"}
+                ],
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"name": "success", "type": "bool"},
+                    {"name": "returnData", "type": "bytes"}
+                ],
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+# 每次 aggregate3 最多读取的代币数（每个代币 4 个调用），代币过多时分成几次调用，避免超出 RPC 的 gas 上限
+MULTICALL_BATCH_SIZE = 100
+
+TOKEN_FIELDS = ('balance', 'decimals', 'symbol', 'name')
+
+
+def decode_text(data):
+    """name() / symbol() 的返回值：标准代币为 string，少数早期代币（如 MKR）为 bytes32"""
+    try:
+        return decode(['string'], data)[0]
+    except Exception:
+        if len(data) == 32:
+            return data.rstrip(b'\0').decode('utf-8', errors='ignore')
+        raise
+
+
+def decode_token(results):
+    """把一个代币的 (balanceOf, decimals, symbol, name) 调用结果解码为 dict；
+    balanceOf 或 decimals 失败时返回 None，name 和 symbol 失败时为 None"""
+    (balance_ok, balance_data), (decimals_ok, decimals_data), symbol_result, name_result = results
+    try:
+        if not (balance_ok and decimals_ok):
+            return None
+        token = {
+            'balance': decode(['uint256'], balance_data)[0],
+            'decimals': decode(['uint8'], decimals_data)[0],
+        }
+    except Exception:
+        # 非合约地址的调用也会成功，但返回空数据
+        return None
+    for field, (ok, data) in (('symbol', symbol_result), ('name', name_result)):
+        try:
+            token[field] = decode_text(data) if ok else None
+        except Exception:
+            token[field] = None
+    return token
+
+
+def token_calls(token, owner):
+    return [
+        token.encode_abi('balanceOf', [owner]),
+        token.encode_abi('decimals'),
+        token.encode_abi('symbol'),
+        token.encode_abi('name'),
+    ]
+
+
+def read_tokens_multicall(w3, token_addrs, owner, erc20_abi, batch_size=MULTICALL_BATCH_SIZE):
+    token = w3.eth.contract(abi=erc20_abi)
+    multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+    tokens = {}
+    for start in range(0, len(token_addrs), batch_size):
+        batch = token_addrs[start:start + batch_size]
+        calls = [
+            (Web3.to_checksum_address(token_addr), True, call_data)
+            for token_addr in batch
+            for call_data in token_calls(token, owner)
+        ]
+        results = multicall.functions.aggregate3(calls).call()
+        for idx, token_addr in enumerate(batch):
+            tokens[token_addr] = decode_token(results[idx * len(TOKEN_FIELDS):(idx + 1) * len(TOKEN_FIELDS)])
+    return tokens
+
+
+def read_tokens_direct(w3, token_addrs, owner, erc20_abi):
+    """没有部署 Multicall3 的链：逐个代币读取，结果格式与 read_tokens_multicall 相同"""
+    token = w3.eth.contract(abi=erc20_abi)
+    tokens = {}
+    for token_addr in token_addrs:
+        results = []
+        for call_data in token_calls(token, owner):
+            try:
+                results.append((True, w3.eth.call({'to': Web3.to_checksum_address(token_addr), 'data': call_data})))
+            except Exception:
+                results.append((False, b''))
+        tokens[token_addr] = decode_token(results)
+    return tokens
+
+
+def read_tokens(w3, token_addrs, owner, erc20_abi):
+    """读取 owner 在一条链上各个代币的链上原始余额、精度、符号和名称，返回 ({代币地址: dict 或 None}, 是否使用了 Multicall3)。
+    优先通过 Multicall3 aggregate3 一次读取所有代币，该链没有 Multicall3 或调用失败时逐个读取"""
+    try:
+        return read_tokens_multicall(w3, token_addrs, owner, erc20_abi), True
+    except Exception:
+        return read_tokens_direct(w3, token_addrs, owner, erc20_abi), False
@@ -1,10 +1,12 @@
 import os
 import json
+import time
 from web3 import Web3
 # from web3.middleware.geth_poa import geth_poa_middleware
 from eth_account import Account
 from dotenv import load_dotenv
 from colorama import Fore, Style, init
+from sweep import ChainResult, NonceTracker, sweep_chains
 
 # ========== 常量与初始化 ==========
 init(autoreset=True)
@@ -129,16 +131,9 @@ def check_env(var, desc):
     return val
 
 # ========== 主链处理逻辑 ==========
-def process_chain(chain_id_str, rpc_info, from_address, to_address, private_key, dry_run, enable_log):
+def process_chain(w3, chain_id, nonce, from_address, to_address, private_key, dry_run):
     try:
-        chain_id = int(chain_id_str)
-        if chain_id_str not in rpc_info:
-            print(f"\n{Fore.RED}❌ 未在 RPC 列表中找到链 ID: {chain_id}{Style.RESET_ALL}")
-            return
-        rpc_url = rpc_info[chain_id_str]
-        w3 = Web3(Web3.HTTPProvider(rpc_url))
         # w3.middleware_onion.inject(geth_poa_middleware, layer=0)
-        nonce = w3.eth.get_transaction_count(from_address)
         balance = w3.eth.get_balance(from_address)
         # ====== 动态估算 gasLimit ======
         tx_for_gas = {'from': from_address, 'to': to_address, 'value': 1}
@@ -156,7 +151,7 @@ def process_chain(chain_id_str, rpc_info, from_address, to_address, private_key,
                 supports_eip1559 = True
         except:
             pass
-        tx = {'nonce': nonce, 'to': to_address, 'chainId': chain_id}
+        tx = {'nonce': nonce.value, 'to': to_address, 'chainId': chain_id}
         if supports_eip1559:
             max_priority_fee = w3.to_wei(1.5, 'gwei')
             base_fee = w3.eth.gas_price
@@ -172,17 +167,40 @@ def process_chain(chain_id_str, rpc_info, from_address, to_address, private_key,
             tx['value'] = value
             if dry_run:
                 print(f"\n{Fore.GREEN}🔜 模拟转账 {w3.from_wei(value, 'ether')}（未发送）{Style.RESET_ALL}")
-                print(f"Dry-run 模拟转账后 Nonce 递增至: {nonce+1}\n")
+                nonce.next()
+                print(f"Dry-run 模拟转账后 Nonce 递增至: {nonce.value}\n")
             else:
                 signed = w3.eth.account.sign_transaction(tx, private_key)
                 tx_hash = w3.eth.send_raw_transaction(signed.raw_transaction)
                 print(f"\n{Fore.GREEN}✅ 成功转出！交易哈希: {w3.to_hex(tx_hash)}{Style.RESET_ALL}")
-                print(f"成功转出后 Nonce 递增至: {nonce+1}\n")
+                nonce.next()
+                print(f"成功转出后 Nonce 递增至: {nonce.value}\n")
         else:
             print(f"\n{Fore.RED}⚠️ 余额 ({w3.from_wei(balance, 'ether')}) 不足支付 gas ({w3.from_wei(eth_gas_cost, 'ether')})，跳过转账{Style.RESET_ALL}\n")
             return "skip"
     except Exception as e:
-        print(f"\n{Fore.RED}❌ 处理链 {chain_id_str} 失败: {e}{Style.RESET_ALL}\n")
+        print(f"\n{Fore.RED}❌ 处理链 {chain_id} 失败: {e}{Style.RESET_ALL}\n")
+
+def sweep_chain(idx, chain_id_str, total_chains, rpc_info, from_address, to_address, private_key, dry_run):
+    """处理一条链，在 sweep_chains 的线程中运行：每条链使用自己的 Web3 实例和 NonceTracker，返回该链的 ChainResult"""
+    try:
+        chain_id = int(chain_id_str)
+        if chain_id_str not in rpc_info:
+            print(f"\n{Fore.RED}❌ 未在 RPC 列表中找到链 ID: {chain_id}{Style.RESET_ALL}\n")
+            return ChainResult(fail=1)
+        rpc_url = rpc_info[chain_id_str]
+        w3 = Web3(Web3.HTTPProvider(rpc_url))
+        nonce = NonceTracker(w3, from_address)
+        print_chain_header(chain_id, rpc_url, idx, total_chains)
+        print_status(f"获取初始 Nonce: {Fore.YELLOW}{nonce.value}{Style.RESET_ALL}", "info")
+    except Exception as e:
+        print(f"{Fore.RED}❌ 获取链 {chain_id_str} Nonce 或 RPC 失败: {e}{Style.RESET_ALL}\n")
+        return ChainResult(fail=1)
+    try:
+        result = process_chain(w3, chain_id, nonce, from_address, to_address, private_key, dry_run)
+    except Exception:
+        return ChainResult(fail=1)
+    return ChainResult(skip=1) if result == "skip" else ChainResult(success=1)
 
 # ========== 主程序入口 ==========
 def main():
@@ -218,38 +236,18 @@ def main():
     print_status(f"RPC 列表加载成功: {Fore.YELLOW}{len(rpc_data)}{Style.RESET_ALL} 个节点", "success")
     print_status(f"链信息加载成功: {Fore.YELLOW}{len(chain_ids)}{Style.RESET_ALL} 条链", "success")
     
-    # 开始处理
+    # 开始处理：各条链并发处理，总耗时接近最慢的一条链
     print_section_header("♻️ 开始批量处理♻️", Fore.GREEN)
-    success_count = 0
-    fail_count = 0
-    skip_count = 0
-    for idx, chain_id_str in enumerate(chain_ids, 1):
-        nonce = None
-        try:
-            chain_id = int(chain_id_str)
-            if chain_id_str not in rpc_info:
-                print(f"\n{Fore.RED}❌ 未在 RPC 列表中找到链 ID: {chain_id}{Style.RESET_ALL}\n")
-                fail_count += 1
-                continue
-            rpc_url = rpc_info[chain_id_str]
-            w3 = Web3(Web3.HTTPProvider(rpc_url))
-            nonce = w3.eth.get_transaction_count(from_address)
-            print_chain_header(chain_id, rpc_url, idx, len(chain_ids))
-            print_status(f"获取初始 Nonce: {Fore.YELLOW}{nonce}{Style.RESET_ALL}", "info")
-        except Exception as e:
-            print(f"{Fore.RED}❌ 获取链 {chain_id_str} Nonce 或 RPC 失败: {e}{Style.RESET_ALL}\n")
-            fail_count += 1
-            continue
-        try:
-            result = process_chain(chain_id_str, rpc_info, from_address, to_address, private_key, dry_run, False)
-            if result == "skip":
-                skip_count += 1
-            else:
-                success_count += 1
-        except Exception:
-            fail_count += 1
+    started = time.time()
+    totals = sweep_chains(
+        chain_ids,
+        lambda idx, chain_id_str: sweep_chain(
+            idx, chain_id_str, len(chain_ids), rpc_info, from_address, to_address, private_key, dry_run
+        )
+    )
+    print_status(f"{len(chain_ids)} 条链处理完成，用时 {time.time() - started:.1f} 秒", "info")
     # 打印总结信息
-    print_summary(success_count, fail_count, skip_count, dry_run)
+    print_summary(totals.success, totals.fail, totals.skip, dry_run)
 
 if __name__ == "__main__":
     main()
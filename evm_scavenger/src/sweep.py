@@ -0,0 +1,106 @@
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from colorama import Fore, Style
+
+
+class ChainResult:
+    """单条链的处理结果统计，所有链完成后相加得到 print_summary 使用的总数"""
+
+    __slots__ = ('success', 'fail', 'skip')
+
+    def __init__(self, success=0, fail=0, skip=0):
+        self.success = success
+        self.fail = fail
+        self.skip = skip
+
+    def add(self, other):
+        self.success += other.success
+        self.fail += other.fail
+        self.skip += other.skip
+
+
+class NonceTracker:
+    """单条链上发送方地址的 nonce：只在开始时从链上读取一次，之后每发送（或模拟发送）一笔交易在本地递增。
+    每条链一个实例，只在处理该链的线程中使用"""
+
+    def __init__(self, w3, address):
+        self.value = w3.eth.get_transaction_count(address)
+
+    def next(self):
+        nonce = self.value
+        self.value += 1
+        return nonce
+
+
+class _ChainOutput:
+    """替换 sys.stdout：处理链的线程把输出先写入自己的缓冲区，该链完成后整块打印，
+    多条链并发处理时各链的输出不会交错；其他线程的输出直接写入原来的 stdout"""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self):
+        self._local.buffer = []
+
+    def finish(self):
+        buffer = self._local.buffer
+        self._local.buffer = None
+        with self._lock:
+            # 逐段写入原来的 stdout，保持 colorama autoreset 的效果与直接打印时相同
+            for text in buffer:
+                self._stream.write(text)
+            self._stream.flush()
+
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            with self._lock:
+                return self._stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        if getattr(self._local, 'buffer', None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def sweep_chains(items, process, max_workers=None):
+    """并发处理各条链：process(链序号, 链) 在独立线程中运行，使用自己的 Web3 实例和 NonceTracker，
+    返回该链的 ChainResult；总耗时接近最慢的一条链。返回所有链相加后的 ChainResult"""
+    items = list(items)
+    totals = ChainResult()
+    if not items:
+        return totals
+    if not max_workers:
+        max_workers = int(os.getenv("SWEEP_CONCURRENCY", "0")) or len(items)
+
+    output = _ChainOutput(sys.stdout)
+
+    def run(idx, item):
+        output.start()
+        try:
+            result = process(idx, item)
+        except Exception as e:
+            print(f"{Fore.RED}❌ 处理第 {idx} 条链失败: {e}{Style.RESET_ALL}\n")
+            result = ChainResult(fail=1)
+        finally:
+            output.finish()
+        return result
+
+    original = sys.stdout
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(items)), thread_name_prefix='chain') as executor:
+            futures = [executor.submit(run, idx, item) for idx, item in enumerate(items, 1)]
+            for future in as_completed(futures):
+                totals.add(future.result())
+    finally:
+        sys.stdout = original
+    return totals